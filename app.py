@@ -1,19 +1,13 @@
 import streamlit as st
-from datetime import datetime, date, timedelta
-from docx import Document
-from docx.shared import Inches
-import numpy as np
-import pandas as pd
-from PIL import Image as PILImage
-from io import BytesIO
-from streamlit_drawable_canvas import st_canvas
-import requests
-import re
+from datetime import datetime, date
 import os
 from dotenv import load_dotenv
-import msal
-from openpyxl import load_workbook
-import urllib.parse
+from template_registry import get_template_registry
+from template_snapshot import schedule_html
+from week_calendar import get_weekday_dates, validate_range
+from instrumentation import count, event, span
+# numpy, PIL, the canvas, the renderer and the Graph/queue modules are imported on
+# page 2, so a cold server paints page 1 without them
 
 # Set page configuration with a favicon
 st.set_page_config(
@@ -26,29 +20,8 @@ st.set_page_config(
 load_dotenv()
 
 # Fetch credentials from environment variables
-CLIENT_ID = os.getenv("CLIENT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-TENANT_ID = os.getenv("TENANT_ID")
 DRIVE_ID = os.getenv("DRIVE_ID")
 
-# Authenticate and acquire an access token
-def acquire_access_token():
-    app = msal.ConfidentialClientApplication(
-        client_id=CLIENT_ID,
-        client_credential=CLIENT_SECRET,
-        authority=f"https://login.microsoftonline.com/{TENANT_ID}",
-    )
-    result = app.acquire_token_for_client(scopes=["https://graph.microsoft.com/.default"])
-    if "access_token" in result:
-        return result["access_token"]
-    else:
-        print("Failed to acquire token")
-        print(result.get("error"))
-        print(result.get("error_description"))
-        exit()
-
-ACCESS_TOKEN = acquire_access_token() 
-
 # ========================
 # Functions
 # ========================
@@ -63,118 +36,122 @@ def get_secret(key):
         return secret
     except (ValueError, TypeError) as e:
         # If an error occurs, fall back to Streamlit secrets
-        if hasattr(st, 'secrets'):
+        # (skipped when there is no secrets.toml, e.g. optional keys when running from .env)
+        if hasattr(st, 'secrets') and st.secrets.load_if_toml_exists():
             return st.secrets.get(key)
         # If still not found, return None or handle as needed
         return None
     
-def upload_to_sharepoint(access_token, drive_id, parent_folder_path, attendance_sheet_file_path):
-    headers = {"Authorization": f"Bearer {access_token}"}
-
-    # URL encode the parent folder path
-    encoded_parent_folder_path = urllib.parse.quote(parent_folder_path)
-
-    # Fetch folders in the parent path
-    parent_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{encoded_parent_folder_path}:/children"
-    response = requests.get(parent_url, headers=headers)
-
-    if response.status_code == 200:
-        # Upload the attendance sheet using the multipart method
-        upload_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{encoded_parent_folder_path}/{attendance_sheet_file_path}:/content"
-
-        with open(attendance_sheet_file_path, "rb") as f:
-            upload_response = requests.put(upload_url, headers=headers, data=f)
-        return upload_response.status_code
+# Poll the background worker until the learner's submission has been uploaded
+@st.experimental_fragment(run_every=2)
+def poll_submission_status(job_id):
+    from submission_queue import get_submission_queue
+    job = get_submission_queue().status(job_id)
+    if job is None or job["status"] in ("done", "failed"):
+        st.rerun()  # Full rerun shows the final message and stops the polling
+    elif job["status"] == "retrying":
+        st.info(f"Still trying to submit your timesheet (attempt {job['attempts']})...")
     else:
-        return f"Error fetching parent folder: {response.status_code} \nError details: {response.text}"
+        st.info("Submitting your timesheet...")
+
+def show_submission_status(job_id):
+    from submission_queue import get_submission_queue
+    job = get_submission_queue().status(job_id)
+    if job is None:
+        st.error("Submission not found, please submit again.")
+    elif job["status"] == "done":
+        if job["stored_name"] and job["stored_name"] != job["file_name"]:
+            # Earlier uploads are kept, so a changed resubmit is stored as a new version
+            st.warning(f"Timesheet already exist with the same name, saved as {job['stored_name']}.")
+        else:
+            st.success(f"Timesheet submitted successfully!")
+    elif job["status"] == "failed":
+        st.error(f"Error submitting timesheet! {job['error']}")
+    else:
+        poll_submission_status(job_id)
 
 # Initialize session state for screen navigation
 if 'page' not in st.session_state:
     st.session_state.page = 1
 if 'learner_signature' not in st.session_state: 
-    st.session_state.learner_signature = None
+    st.session_state.learner_signature = None  # Packed ink bitmask, see signature.pack_ink
+if 'signature_strokes' not in st.session_state:
+    st.session_state.signature_strokes = None  # Stroke fingerprint the bitmask was packed from
 if 'declaration_date' not in st.session_state: 
     st.session_state.declaration_date = None    
-if 'checkboxes' not in st.session_state: 
-    st.session_state.checkboxes = []  # Store checkbox states for each attendance row
-if 'attendance_checkboxes' not in st.session_state:
-    st.session_state.attendance_checkboxes = []  # List of tuples [(am_present, am_absent, pm_present, pm_absent), ...]
+if 'attendance' not in st.session_state:
+    st.session_state.attendance = None  # Bool array, one row per day: am_present, am_absent, pm_present, pm_absent, signed
 if 'start_date' not in st.session_state:
     st.session_state.start_date = None
 if 'end_date' not in st.session_state:
     st.session_state.end_date = None
+if 'group' not in st.session_state:
+    st.session_state.group = int(get_secret("group") or 1)
+if 'week' not in st.session_state:
+    st.session_state.week = None  # Resolved from the dates entered on page 1
+if 'submission_job' not in st.session_state:
+    st.session_state.submission_job = None  # Job id of the learner's last queued submission
     
-# Function to load DOCX data, skipping header row in the second table
-def load_docx_data():
-    doc = Document(fr'resources/Skills Boot Camp Week {get_secret("week")} Group 1 Timesheet.docx')
-
-    # Read the first paragraph for the weekly timesheet information
-    weekly_timesheet_info = doc.paragraphs[1].text  # Get the first paragraph
-    
-    day, session_activity, facilitator, time, notes_comments = [], [], [], [], []
-    attendance_data = []  # for second table
-    
-    for table_idx, table in enumerate(doc.tables):
-        for row_idx, row in enumerate(table.rows):
-            cells = [cell.text.replace('\n', ' ').strip() for cell in row.cells]
-            if table_idx == 0 and len(cells) == 5:
-                day.append(cells[0])
-                session_activity.append(cells[1])
-                facilitator.append(cells[2])
-                time.append(cells[3])
-                notes_comments.append(cells[4])
-            elif table_idx == 1 and len(cells) >= 4:
-                if row_idx == 0:
-                    continue  # Skip the header row
-                while len(cells) < 5:
-                    cells.append("")  # Add empty cell if columns are missing
-                attendance_data.append(cells[:5])
-
-    df1 = pd.DataFrame({
-        "Day": day,
-        "Session/Activity": session_activity,
-        "Facilitator": facilitator,
-        "Time": time,
-        "Notes/Comments": notes_comments
-    })
-    df2 = pd.DataFrame(attendance_data, columns=["Day", "Date", "AM", "PM", "Learner Signature"])
-    
-    return weekly_timesheet_info, df1, df2
+# Every week/group template is indexed (and parsed) once per server process
+registry = get_template_registry()
+
+# Load the template's precomputed snapshot (header, schedule, attendance rows), so pages
+# 1 and 2 never parse the .docx or need python-docx/pandas
+def load_docx_data(week, group):
+    with span("load_docx_data"):
+        return registry.snapshot(week, group)
+
+def get_programme_start(group):
+    value = get_secret(f"PROGRAMME_START_GROUP_{group}") or get_secret("PROGRAMME_START")
+    return datetime.strptime(value, "%d/%m/%Y").date() if value else None
+
+def resolve_week(start_date, end_date, group):
+    """Pick the programme week the learner's dates fall in, or the configured week if no programme start is set"""
+    programme_start = get_programme_start(group)
+    if programme_start is None:
+        week = get_secret("week")
+        if week is None:
+            raise LookupError("No PROGRAMME_START or week configured")
+        return int(week)
+    return registry.week_for(start_date, programme_start, end_date)
 
 def is_signature_drawn(signature):
-    if signature is None or not isinstance(signature, np.ndarray) or np.all(signature == 255):
-        return False
-    return True
-
-def get_weekday_dates(start_date, end_date):
-    """Generate start date, Tuesday, Wednesday, Thursday, and end date"""
-    dates = {
-        'start_date': start_date.strftime("%d/%m/%Y"),
-        'tu_date': None,
-        'we_date': None,
-        'th_date': None,
-        'end_date': end_date.strftime("%d/%m/%Y"),
-    }
-
-    current_date = start_date
-    while current_date <= end_date:
-        if current_date.weekday() == 1:  # Tuesday
-            dates['tu_date'] = current_date.strftime("%d/%m/%Y")
-        elif current_date.weekday() == 2:  # Wednesday
-            dates['we_date'] = current_date.strftime("%d/%m/%Y")
-        elif current_date.weekday() == 3:  # Thursday
-            dates['th_date'] = current_date.strftime("%d/%m/%Y")
-        current_date += timedelta(days=1)
-
-    return dates
-
-# Load data from DOCX
-weekly_timesheet_info, df1, df2 = load_docx_data()
+    from signature import has_ink
+    return has_ink(signature)
+
+# Attendance rows as a fragment: a checkbox click reruns just this grid, not the whole page
+@st.experimental_fragment
+def attendance_grid(rows, weekday_dates):
+    attendance = st.session_state.attendance
+    for idx, (day, date_key) in enumerate(rows):
+        row_cols = st.columns([1, 1, 1, 1, 1])
+        row_cols[0].write(day)
+
+        row_cols[1].write(weekday_dates.get(date_key) or "")
+
+        # Checkboxes for AM
+        am_present = row_cols[2].checkbox("Present (AM)", key=f"am_present_{idx}", value=bool(attendance[idx, 0]))
+        am_absent = row_cols[2].checkbox("Absent (AM)", key=f"am_absent_{idx}", value=bool(attendance[idx, 1]))
+
+        # Checkboxes for PM
+        pm_present = row_cols[3].checkbox("Present (PM)", key=f"pm_present_{idx}", value=bool(attendance[idx, 2]))
+        pm_absent = row_cols[3].checkbox("Absent (PM)", key=f"pm_absent_{idx}", value=bool(attendance[idx, 3]))
+
+        # Learner Signature Checkbox
+        signed = row_cols[4].checkbox("Signature", key=f"signature_{idx}", value=bool(attendance[idx, 4]))
+
+        # Store checkbox states in the row
+        attendance[idx] = (am_present, am_absent, pm_present, pm_absent, signed)
 
 # First Screen: Display the Timesheet table
 if st.session_state.page == 1:
-    st.header(f'Skills Boot Camp Week {get_secret("week")} Timesheet')
-    
+    header = st.empty()  # Filled in once the week is known from the dates
+
+    # Only ask for the group when this server holds templates for more than one
+    groups = registry.groups()
+    if len(groups) > 1:
+        st.session_state.group = st.selectbox("Group", groups, index=groups.index(st.session_state.group) if st.session_state.group in groups else 0)
+
     # Date input fields
     if isinstance(st.session_state.get("start_date"), str):
         st.session_state.start_date = datetime.strptime(st.session_state.get("start_date"), "%d/%m/%Y").date()
@@ -206,17 +183,30 @@ if st.session_state.page == 1:
     
     # Check if both dates are provided
     if st.session_state.start_date and st.session_state.end_date:
+        try:
+            start_date = datetime.strptime(st.session_state.start_date, "%d/%m/%Y").date()
+            end_date = datetime.strptime(st.session_state.end_date, "%d/%m/%Y").date()
+            validate_range(start_date, end_date)  # Bad ranges stop here, before the learner can move on
+            st.session_state.week = resolve_week(start_date, end_date, st.session_state.group)
+            snapshot = load_docx_data(st.session_state.week, st.session_state.group)
+        except (LookupError, ValueError) as e:
+            header.header("Skills Boot Camp Weekly Timesheet")
+            st.error(str(e))
+            st.stop()
+        header.header(f'Skills Boot Camp Week {st.session_state.week} Timesheet')
+
         # Replace dates in weekly_timesheet_info
-        weekly_timesheet_info = weekly_timesheet_info.replace("start_date", st.session_state.start_date)
+        weekly_timesheet_info = snapshot["weekly_timesheet_info"].replace("start_date", st.session_state.start_date)
         weekly_timesheet_info = weekly_timesheet_info.replace("end_date", st.session_state.end_date)
     else:
+        header.header("Skills Boot Camp Weekly Timesheet")
         st.warning("Please enter both start and end dates.")
         st.stop()  # Stop execution until both dates are entered
 
 
     st.text(weekly_timesheet_info)
 
-    st.markdown(df1.to_html(index=False, header=False), unsafe_allow_html=True)
+    st.markdown(schedule_html(snapshot), unsafe_allow_html=True)
     
     if st.button("Next"):
         st.session_state.page = 2
@@ -224,10 +214,23 @@ if st.session_state.page == 1:
 
 # Second Screen: Learner Declaration and Attendance Table with Checkboxes
 elif st.session_state.page == 2:    
+    from dataclasses import replace
+    import numpy as np
+    from streamlit_drawable_canvas import st_canvas
+    from signature import canvas_png_bytes, encode_signature, pack_ink, stroke_fingerprint, unpack_ink
+    from template_render import Submission, timesheet_file_name
+    from submission_index import content_hash
+    from submission_queue import get_submission_queue
+
+    # Started (and the templates compiled on its worker) while the learner fills in the form
+    queue = get_submission_queue()
+
+    attendance_rows = load_docx_data(st.session_state.week, st.session_state.group)["attendance_rows"]
 
     # Clear attendance checkboxes if returning to this page
-    if not st.session_state.attendance_checkboxes:  
-        st.session_state.attendance_checkboxes = [(False, False, False, False) for _ in range(len(df2))]
+    if st.session_state.attendance is None or len(st.session_state.attendance) != len(attendance_rows):
+        st.session_state.attendance = np.zeros((len(attendance_rows), 5), dtype=bool)
+    weekday_dates = get_weekday_dates(datetime.strptime(st.session_state.get("start_date"), "%d/%m/%Y").date(), datetime.strptime(st.session_state.get("end_date"), "%d/%m/%Y").date())
 
     st.subheader("Attendance Register Declaration (Monday - Friday)")
     st.session_state.learner_name = st.text_input("Enter your full name")
@@ -250,45 +253,8 @@ elif st.session_state.page == 2:
     header_cols[4].write("Learner Signature")
 
 
-    # Track checkbox states in session state to retain selections
-    checkboxes = []
-    
-    weekday_dates = get_weekday_dates(datetime.strptime(st.session_state.get("start_date"), "%d/%m/%Y").date(), datetime.strptime(st.session_state.get("end_date"), "%d/%m/%Y").date())
-    for idx, row in df2.iterrows():
-        row_cols = st.columns([1, 1, 1, 1, 1])
-        row_cols[0].write(row["Day"])
-        # row_cols[1].write(row["Date"])
-
-        # Use the weekday_dates dictionary to get the date value
-        # Assuming you want to map 'Date' in df2 to the keys from weekday_dates
-        if row["Date"] == "start_date":
-            row_cols[1].write(weekday_dates['start_date'])
-        elif row["Date"] == "tu_date":
-            row_cols[1].write(weekday_dates['tu_date'])
-        elif row["Date"] == "we_date":
-            row_cols[1].write(weekday_dates['we_date'])
-        elif row["Date"] == "th_date":
-            row_cols[1].write(weekday_dates['th_date'])
-        elif row["Date"] == "end_date":
-            row_cols[1].write(weekday_dates['end_date'])
-        
-        # Checkboxes for AM
-        am_present = row_cols[2].checkbox("Present (AM)", key=f"am_present_{idx}", value=st.session_state.attendance_checkboxes[idx][0])
-        am_absent = row_cols[2].checkbox("Absent (AM)", key=f"am_absent_{idx}", value=st.session_state.attendance_checkboxes[idx][1])
-
-        # Checkboxes for PM
-        pm_present = row_cols[3].checkbox("Present (PM)", key=f"pm_present_{idx}", value=st.session_state.attendance_checkboxes[idx][2])
-        pm_absent = row_cols[3].checkbox("Absent (PM)", key=f"pm_absent_{idx}", value=st.session_state.attendance_checkboxes[idx][3])
-
-        # Store checkbox states in a tuple
-        st.session_state.attendance_checkboxes[idx] = (am_present, am_absent, pm_present, pm_absent)
-
-        # Learner Signature Checkbox
-        checked = row_cols[4].checkbox("Signature", key=f"signature_{idx}")
-        checkboxes.append(checked)
-    
-    # Update checkboxes in session state
-    st.session_state.checkboxes = checkboxes
+    # Only the grid reruns when one of its checkboxes is clicked
+    attendance_grid(attendance_rows, weekday_dates)
 
     # Signature Section
     st.subheader("Learner Declaration")
@@ -306,137 +272,76 @@ elif st.session_state.page == 2:
         drawing_mode="freedraw",
         key="canvas",
     )
-    st.session_state.learner_signature = canvas_result.image_data
+    # Only re-pack the ink when the strokes actually changed; the raster is rebuilt at submit time
+    if canvas_result.json_data is not None:
+        strokes = stroke_fingerprint(canvas_result.json_data)
+        if strokes != st.session_state.signature_strokes:
+            st.session_state.signature_strokes = strokes
+            st.session_state.learner_signature = pack_ink(canvas_result.image_data) if strokes else None
 
     declaration_date = date.today().strftime("%d-%m-%Y")
     st.write(f"Date: **{declaration_date}**")    
 
     if st.button("Submit"):
         
-        valid_attendance = True
-        for idx, (am_present, am_absent, pm_present, pm_absent) in enumerate(st.session_state.attendance_checkboxes):
-            print(f"Day {idx + 1}: AM Present: {am_present}, AM Absent: {am_absent}, PM Present: {pm_present}, PM Absent: {pm_absent}")
-            if not (am_present or pm_present or am_absent or pm_absent):  # At least one AM or PM must be checked
-                valid_attendance = False
-                print(f"Invalid attendance on Day {idx + 1}")
-                break
-
-        print(f"Valid attendance: {valid_attendance}")
+        # At least one AM or PM box must be checked for every day
+        marked_days = st.session_state.attendance[:, :4].any(axis=1)
+        valid_attendance = bool(marked_days.all())
+        event("submit_attendance", week=st.session_state.week, group=st.session_state.group,
+              valid=valid_attendance, attendance=st.session_state.attendance.astype(int).tolist(),
+              first_invalid_day=None if valid_attendance else int(marked_days.argmin()) + 1)
 
         if valid_attendance:
             if is_signature_drawn(st.session_state.learner_signature) and st.session_state.learner_name:
-                filled_doc = Document(fr'resources/Skills Boot Camp Week {get_secret("week")} Group 1 Timesheet.docx')
-                
-                for paragraph in filled_doc.paragraphs:
-                    if 'start_date' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('start_date', str(st.session_state.start_date))
-                    if 'end_date' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('end_date', str(st.session_state.end_date)                        )
-                    if 'learner_name' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('learner_name', str(st.session_state.learner_name))
-                    if 'date' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('date', declaration_date)
-                    # Replace the placeholder text with the signature image
-                    if 'learner_signature' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('learner_signature', "")
-                        
-                        # Create a new run within the paragraph to add the image
-                        run = paragraph.add_run()
-                        signature_image = PILImage.fromarray(st.session_state.learner_signature.astype('uint8'), 'RGBA')
-                        signature_image_path = "learner_signature.png"
-                        signature_image.save(signature_image_path)
-                        
-                        # Insert the image into the document in place of the placeholder
-                        run.add_picture(signature_image_path, width=Inches(2))  # Adjust width as needed
-
-                # Insert signature image in the "Learner Signature" cell for each checked row
-                for table_idx, table in enumerate(filled_doc.tables):
-                    if table_idx == 1:  # Ensure we're modifying the attendance table
-                        for row_idx, row in enumerate(table.rows[1:]):  # Skip the header row
-
-                            # Replace keys with date values
-                            day_text = row.cells[1].text  # Assuming the day is in the first cell
-                            if day_text == "start_date":
-                                row.cells[1].text = weekday_dates['start_date']
-                            elif day_text == "tu_date":
-                                row.cells[1].text = weekday_dates['tu_date']
-                            elif day_text == "we_date":
-                                row.cells[1].text = weekday_dates['we_date']
-                            elif day_text == "th_date":
-                                row.cells[1].text = weekday_dates['th_date']
-                            elif day_text == "end_date":
-                                row.cells[1].text = weekday_dates['end_date']
-
-                            # Get the checkboxes state for the current row
-                            am_present_checked = st.session_state.attendance_checkboxes[row_idx][0]  # AM Present
-                            am_absent_checked = st.session_state.attendance_checkboxes[row_idx][1]   # AM Absent
-                            pm_present_checked = st.session_state.attendance_checkboxes[row_idx][2]  # PM Present
-                            pm_absent_checked = st.session_state.attendance_checkboxes[row_idx][3]   # PM Absent
-                            
-                            # Handle AM placeholders
-                            am_text = row.cells[2].text  # AM is in cell 2
-                            if am_present_checked:
-                                am_text = am_text.replace('[am_pr]', '✔').replace('[am_ab]', ' ')
-                            else:
-                                am_text = am_text.replace('[am_pr]', ' ').replace('[am_ab]', '✔' if am_absent_checked else ' ')
-
-                            row.cells[2].text = am_text
-                            
-                            # Handle PM placeholders
-                            pm_text = row.cells[3].text  # PM is in cell 3
-                            if pm_present_checked:
-                                pm_text = pm_text.replace('[pm_pr]', '✔').replace('[pm_ab]', ' ')
-                            else:
-                                pm_text = pm_text.replace('[pm_pr]', ' ').replace('[pm_ab]', '✔' if pm_absent_checked else ' ')
-
-                            row.cells[3].text = pm_text
-
-                            # "Learner Signature" column
-                            cell = row.cells[4]  
-                            if st.session_state.checkboxes[row_idx]:  # If checkbox was checked
-                                # Clear text and add image
-                                cell.text = ""
-                                run = cell.paragraphs[0].add_run()
-                                run.add_picture(signature_image_path, width=Inches(0.5))  # Adjust width as needed
-                            else:
-                                cell.text = "Absent"  # Clear any placeholder text if unchecked
-
-                # After using the signature image
-                try:
-                    if os.path.exists(signature_image_path):
-                        os.remove(signature_image_path)
-                except Exception as e:
-                    st.warning(f"Could not remove temporary signature file: {e}")
-                
-                # Generate a unique file name based on the learner's name
-                safe_learner_name = re.sub(r'\W+', '_', st.session_state.learner_name)
-                filled_doc_path = f'Timesheet_w{get_secret("week")}_{safe_learner_name}.docx'
-                # Add error handling for document saving
-                try:
-                    filled_doc.save(filled_doc_path)
-                except Exception as e:
-                    st.error(f"Error saving document: {e}")
-
-                # with open(filled_doc_path, "rb") as file:
-                #     st.download_button(f"Download Filled Timesheet for {st.session_state.learner_name}", file, filled_doc_path)
-                
-                with st.spinner('Submitting your timesheet...'):
-                    # Upload to share point
-                    parent_folder_path = get_secret("PARENT_FOLDER_PATH")
-                    status_code=upload_to_sharepoint(ACCESS_TOKEN, DRIVE_ID, parent_folder_path, filled_doc_path)
-                    if status_code == 200:
-                        st.warning(f"Timesheet already exist with the same name.")
-                    elif status_code == 201:
-                        st.success(f"Timesheet submitted successfully!")
-                    elif status_code == 400:
-                        st.error(f"Error submitting timesheet!")
-                    else:
-                        st.error(status_code)
+                packed = st.session_state.learner_signature
+                submission = Submission(
+                    learner_name=st.session_state.learner_name,
+                    declaration_date=declaration_date,
+                    dates=weekday_dates,
+                    attendance=[tuple(row) for row in st.session_state.attendance[:, :4].tolist()],
+                    signed_rows=st.session_state.attendance[:, 4].tolist(),
+                    signature_png=None,  # Encoded below, only if this isn't a resubmit
+                )
+
+                # An identical resubmit (same fields, same ink) gets the earlier job back before
+                # anything is encoded, rendered or uploaded
+                digest = content_hash(submission, signature=packed["bits"])
+                existing_job = queue.find(st.session_state.week, st.session_state.group, submission.learner_name, digest)
+                if existing_job is not None:
+                    st.session_state.submission_job = existing_job
+                    st.info("This timesheet has already been submitted.")
+                    count("submit_total", result="duplicate")
+                else:
+                    # Cropped, downscaled and 1-bit encoded once; the renderer stores it in the package a single time.
+                    # The canvas is still on hand in this rerun, so 'before' is measured on what was drawn
+                    before_bytes = canvas_png_bytes(canvas_result.image_data) if canvas_result.image_data is not None else None
+                    signature_png, signature_report = encode_signature(unpack_ink(packed), before_bytes=before_bytes)
+
+                    # Generate a unique file name based on the learner's name
+                    filled_doc_name = timesheet_file_name(st.session_state.week, st.session_state.learner_name)
+
+                    # Rendering and the SharePoint upload happen on the background worker
+                    st.session_state.submission_job = queue.enqueue(
+                        replace(submission, signature_png=signature_png),
+                        week=st.session_state.week,
+                        group=st.session_state.group,
+                        drive_id=DRIVE_ID,
+                        folder_path=get_secret("PARENT_FOLDER_PATH"),
+                        file_name=filled_doc_name,
+                        signature_report=signature_report,
+                        digest=digest,
+                    )
+                    count("submit_total", result="queued")
             else:
+                count("submit_total", result="missing_name_or_signature")
                 st.warning("Please enter your name & draw the signature!")
         else:
+            count("submit_total", result="invalid_attendance")
             st.warning("Please ensure at least one attendance checkbox (AM or PM) is checked for each day!")
 
+    if st.session_state.submission_job:
+        show_submission_status(st.session_state.submission_job)
+
     if st.button("Back"):
         st.session_state.page = 1
         st.experimental_rerun()
@@ -0,0 +1,280 @@
+"""Load test: N concurrent learners submitting through app.py against a local fake Graph.
+
+    python benchmarks/bench_load.py [--sessions 20] [--concurrency 4] [--latency 0.05] [--out load.json]
+    python benchmarks/bench_load.py --compare baseline.json
+
+Each session drives the real app headlessly with Streamlit's AppTest: dates on
+page 1, Next, attendance, name and signature on page 2, then Submit. AppTest
+isn't thread-safe, so concurrent sessions run in separate processes that only
+enqueue; one submission queue in this process renders and uploads everything to
+a FakeGraph (with `--latency` seconds added per request) using a static token.
+Reports p50/p95 per stage (template load, fill and save included) and submissions
+per second, and writes the results as JSON so runs can be compared across versions.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import graph_auth  # noqa: E402
+import instrumentation  # noqa: E402
+import submission_queue  # noqa: E402
+from fake_graph import FakeGraph  # noqa: E402
+from signature import pack_ink, stroke_fingerprint  # noqa: E402
+from template_registry import get_template_registry  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+FOLDER = "Timesheets/Load Test"
+START, END = date(2026, 10, 12), date(2026, 10, 16)
+
+
+class StaticToken:
+    """Token provider stand-in: no MSAL, no network."""
+
+    def get_token(self):
+        return "load-test-token"
+
+    def invalidate(self):
+        pass
+
+
+class SpanSamples:
+    """Instrumentation sink that keeps every span's duration, for percentiles the
+    bucketed histograms can't give. Records are passed on to `sink`, if any."""
+
+    STAGES = ("template_load", "template_fill", "template_save")
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.seconds = {stage: [] for stage in self.STAGES}
+
+    def write(self, record):
+        if record.get("type") == "span" and record["name"] in self.seconds:
+            self.seconds[record["name"]].append(record["seconds"])
+        if self.sink is not None:
+            self.sink.write(record)
+
+
+def learner_name(n):
+    letters = ""
+    n += 26 * 26  # at least three letters
+    while n:
+        n, r = divmod(n, 26)
+        letters = "abcdefghijklmnopqrstuvwxyz"[r] + letters
+    return f"Learner {letters.capitalize()}"
+
+
+def signature_state(n):
+    canvas = np.zeros((150, 400, 4), dtype=np.uint8)
+    canvas[60:90, 40:200 + n % 150] = (0, 0, 0, 255)
+    return pack_ink(canvas)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(round(p * (len(values) - 1))), len(values) - 1)]
+
+
+def summarise(values):
+    if not values:
+        return None
+    return {"count": len(values), "mean": sum(values) / len(values),
+            "p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "max": max(values)}
+
+
+@contextmanager
+def keep_main_module():
+    # AppTest installs the app as __main__; put ours back so the pool can unpickle tasks
+    main_module = sys.modules["__main__"]
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+
+def _init_session_process(db_path):
+    # Sessions only enqueue here; the queue in the parent process does the work
+    submission_queue._queue = submission_queue.SubmissionQueue(db_path)
+    with keep_main_module():
+        AppTest.from_file(APP, default_timeout=120).run()  # warm up imports and the template registry
+
+
+def learner_session(n):
+    with keep_main_module():
+        return _learner_session(n)
+
+
+def _learner_session(n):
+    """One learner's trip through the app. Returns (job id, {stage: seconds})."""
+    timings = {}
+    at = AppTest.from_file(APP, default_timeout=120)
+
+    start = time.perf_counter()
+    at.run()
+    at.date_input[0].set_value(START)
+    at.date_input[1].set_value(END)
+    at.run()
+    timings["page1"] = time.perf_counter() - start
+    assert not at.exception and not at.error, (at.exception, at.error)
+
+    start = time.perf_counter()
+    at.button[0].click().run()  # Next
+    timings["next"] = time.perf_counter() - start
+
+    for checkbox in at.checkbox:
+        if checkbox.label in ("Present (AM)", "Present (PM)", "Signature"):
+            checkbox.check()
+    at.text_input[0].input(learner_name(n))
+    start = time.perf_counter()
+    at.run()
+    timings["page2"] = time.perf_counter() - start
+
+    at.session_state["learner_signature"] = signature_state(n)
+    at.session_state["signature_strokes"] = stroke_fingerprint({"objects": [{"path": [0] * (n + 1)}]})
+    start = time.perf_counter()
+    at.button[0].click().run()  # Submit
+    timings["submit"] = time.perf_counter() - start
+    assert not at.exception and not at.warning, (at.exception, at.warning)
+    return at.session_state["submission_job"], timings
+
+
+def wait_for_jobs(db_path, job_ids, timeout):
+    deadline = time.time() + timeout
+    placeholders = ",".join("?" * len(job_ids))
+    while time.time() < deadline:
+        with sqlite3.connect(db_path) as db:
+            pending = db.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE id IN ({placeholders}) AND status NOT IN ('done', 'failed')",
+                job_ids,
+            ).fetchone()[0]
+        if not pending:
+            return
+        time.sleep(0.05)
+    raise TimeoutError(f"{pending} submissions still pending after {timeout}s")
+
+
+def job_timings(db_path, job_ids):
+    placeholders = ",".join("?" * len(job_ids))
+    with sqlite3.connect(db_path) as db:
+        db.row_factory = sqlite3.Row
+        return [dict(row) for row in db.execute(
+            f"SELECT status, render_seconds, upload_seconds, started_at - created_at AS wait_seconds,"
+            f" finished_at - created_at AS total_seconds, document_bytes FROM jobs WHERE id IN ({placeholders})",
+            job_ids,
+        )]
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20, help="learners to submit in total")
+    parser.add_argument("--concurrency", type=int, default=4, help="learner sessions running at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake Graph adds per request")
+    parser.add_argument("--week", default="1")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--out", default="bench_load.json")
+    parser.add_argument("--compare", help="results JSON from an earlier run to show p50/p95 changes against")
+    args = parser.parse_args()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    db_path = os.path.join(workdir, "submissions.db")
+    graph = FakeGraph(folders=[FOLDER], latency=args.latency).start()
+    os.environ.update({
+        "GRAPH_BASE_URL": graph.url, "DRIVE_ID": "load-test", "PARENT_FOLDER_PATH": FOLDER,
+        "SUBMISSION_QUEUE_DB": db_path, "week": args.week,
+    })
+    graph_auth._provider = StaticToken()
+    # Every worker-side span is sampled, so load/fill/save get real p50/p95
+    metrics = instrumentation.get_instrumentation()
+    samples = metrics.sink = SpanSamples(metrics.sink)
+    metrics.sample_rate = 1.0
+
+    # Sessions enqueue from other processes and can't wake the dispatcher, so poll often
+    queue = submission_queue._queue = submission_queue.SubmissionQueue(
+        db_path, poll_interval=0.02, warmup=get_template_registry().preload_compiled).start()
+    print(f"{args.sessions} sessions, {args.concurrency} at a time, Graph latency {1000 * args.latency:.0f} ms, "
+          f"{queue.workers} queue workers")
+    stages, job_ids = {}, []
+    with ProcessPoolExecutor(max_workers=args.concurrency, initializer=_init_session_process,
+                             initargs=(db_path,)) as pool:
+        # Start every process (and its warm-up) before the clock starts
+        list(pool.map(time.sleep, [0.1] * args.concurrency))
+        start = time.perf_counter()
+        for job_id, timings in pool.map(learner_session, range(args.sessions)):
+            job_ids.append(job_id)
+            for stage, seconds in timings.items():
+                stages.setdefault(stage, []).append(seconds)
+        submitted = time.perf_counter() - start
+    wait_for_jobs(db_path, job_ids, args.timeout)
+    elapsed = time.perf_counter() - start
+    queue.stop()
+    graph.stop()
+
+    jobs = job_timings(db_path, job_ids)
+    for key, stage in (("render_seconds", "render"), ("upload_seconds", "upload"),
+                       ("wait_seconds", "queue_wait"), ("total_seconds", "queued_to_uploaded")):
+        stages[stage] = [job[key] for job in jobs if job[key] is not None]
+    stages.update(samples.seconds)
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "submissions": len(job_ids),
+        "failed": sum(job["status"] == "failed" for job in jobs),
+        "uploaded_files": len(graph.files),
+        "submissions_per_second": len(job_ids) / elapsed,
+        "sessions_per_second": len(job_ids) / submitted,
+        "stages": {stage: summarise(values) for stage, values in stages.items()},
+        # Worker-side spans (template load/fill/save, token, upload) and counters from this process
+        "instrumentation": instrumentation.get_instrumentation().snapshot(),
+    }
+    for stage, summary in results["stages"].items():
+        if summary:
+            line = f"{stage:<20} p50 {1000 * summary['p50']:8.1f} ms   p95 {1000 * summary['p95']:8.1f} ms"
+            before = (baseline or {}).get("stages", {}).get(stage)
+            if before:
+                line += (f"   (was {1000 * before['p50']:.1f} / {1000 * before['p95']:.1f} ms,"
+                         f" p95 {100 * (summary['p95'] / before['p95'] - 1):+.0f}%)")
+            print(line)
+    for name, series in results["instrumentation"]["spans"].items():
+        if name.removesuffix("_seconds") in SpanSamples.STAGES:
+            continue  # Already listed with percentiles above
+        for row in series:
+            print(f"  span {name:<28} mean {1000 * row['mean']:8.2f} ms over {row['count']}")
+    print(f"{results['submissions']} submitted ({results['failed']} failed), "
+          f"{results['submissions_per_second']:.1f} submissions/s end to end"
+          + (f" (was {baseline['submissions_per_second']:.1f})" if baseline else ""))
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""PDF export: generation time and file size, next to the .docx render.
+
+    python benchmarks/bench_pdf.py [--week 1] [--iterations 50] [--documents 40] [--workers 2]
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_render import bench, sample_canvas, sample_submission  # noqa: E402
+from pdf_export import get_pdf_pool, render_pdf  # noqa: E402
+from signature import encode_signature  # noqa: E402
+from template_registry import TemplateRegistry  # noqa: E402
+from template_render import compile_template, render  # noqa: E402
+from template_snapshot import load_snapshot  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--week", default="1")
+    parser.add_argument("--group", default="1")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--documents", type=int, default=40, help="PDFs to render through the process pool")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    path = TemplateRegistry().path(args.week, args.group)
+    snapshot = load_snapshot(path)
+    compiled = compile_template(path)
+    signature_png, _ = encode_signature(sample_canvas())
+    submission = replace(sample_submission(), signature_png=signature_png)
+    week = int(args.week)
+
+    bench("docx render", lambda: render(compiled, submission), args.iterations)
+    bench("pdf render", lambda: render_pdf(snapshot, submission, week), args.iterations)
+
+    # Throughput with the pool the queue uses (fpdf is imported as each worker starts)
+    os.environ["PDF_WORKERS"] = str(args.workers)
+    with get_pdf_pool() as pool:
+        start = time.perf_counter()
+        first = pool.submit(render_pdf, snapshot, submission, week).result()
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        sizes = [len(pdf) for pdf in pool.map(render_pdf, [snapshot] * args.documents,
+                                              [submission] * args.documents, [week] * args.documents)]
+        elapsed = time.perf_counter() - start
+    print(f"pool of {args.workers}: first PDF {1000 * cold:.0f} ms, "
+          f"then {args.documents / elapsed:.1f} PDFs/s")
+    print(f"pdf size: {len(first)} bytes (min {min(sizes)}, max {max(sizes)}), "
+          f"docx size: {len(render(compiled, submission))} bytes")
+
+
+if __name__ == "__main__":
+    main()
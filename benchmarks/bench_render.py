@@ -0,0 +1,133 @@
+"""Compare the old python-docx fill with the compiled template renderer.
+
+    python benchmarks/bench_render.py [--week 1] [--iterations 50]
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+from io import BytesIO
+
+import numpy as np
+from docx import Document
+from docx.shared import Inches
+from PIL import Image as PILImage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from signature import encode_signature  # noqa: E402
+from template_render import Submission, compile_template, render  # noqa: E402
+
+
+def sample_canvas():
+    signature = np.full((150, 400, 4), 255, dtype=np.uint8)
+    signature[60:90, 40:360, :3] = 0  # a thick stroke
+    return signature
+
+
+def sample_signature():
+    buffer = BytesIO()
+    PILImage.fromarray(sample_canvas(), 'RGBA').save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def sample_submission():
+    return Submission(
+        learner_name="Jane Doe",
+        declaration_date="17-10-2026",
+        dates={'start_date': '12/10/2026', 'tu_date': '13/10/2026', 'we_date': '14/10/2026',
+               'th_date': '15/10/2026', 'end_date': '16/10/2026'},
+        attendance=[(True, False, True, False)] * 5,
+        signed_rows=[True] * 5,
+        signature_png=sample_signature(),
+    )
+
+
+def legacy_fill(path, submission):
+    """The per-submit python-docx path app.py used before the compiled renderer."""
+    filled_doc = Document(path)
+    signature_image = BytesIO(submission.signature_png)
+
+    for paragraph in filled_doc.paragraphs:
+        if 'start_date' in paragraph.text:
+            paragraph.text = paragraph.text.replace('start_date', submission.dates['start_date'])
+        if 'end_date' in paragraph.text:
+            paragraph.text = paragraph.text.replace('end_date', submission.dates['end_date'])
+        if 'learner_name' in paragraph.text:
+            paragraph.text = paragraph.text.replace('learner_name', submission.learner_name)
+        if 'date' in paragraph.text:
+            paragraph.text = paragraph.text.replace('date', submission.declaration_date)
+        if 'learner_signature' in paragraph.text:
+            paragraph.text = paragraph.text.replace('learner_signature', "")
+            paragraph.add_run().add_picture(signature_image, width=Inches(2))
+
+    table = filled_doc.tables[1]
+    for row_idx, row in enumerate(table.rows[1:]):
+        day_text = row.cells[1].text
+        if day_text in submission.dates:
+            row.cells[1].text = submission.dates[day_text]
+        am_present, am_absent, pm_present, pm_absent = submission.attendance[row_idx]
+        am_text = row.cells[2].text
+        if am_present:
+            am_text = am_text.replace('[am_pr]', '✔').replace('[am_ab]', ' ')
+        else:
+            am_text = am_text.replace('[am_pr]', ' ').replace('[am_ab]', '✔' if am_absent else ' ')
+        row.cells[2].text = am_text
+        pm_text = row.cells[3].text
+        if pm_present:
+            pm_text = pm_text.replace('[pm_pr]', '✔').replace('[pm_ab]', ' ')
+        else:
+            pm_text = pm_text.replace('[pm_pr]', ' ').replace('[pm_ab]', '✔' if pm_absent else ' ')
+        row.cells[3].text = pm_text
+        cell = row.cells[4]
+        if submission.signed_rows[row_idx]:
+            cell.text = ""
+            cell.paragraphs[0].add_run().add_picture(signature_image, width=Inches(0.5))
+        else:
+            cell.text = "Absent"
+
+    buffer = BytesIO()
+    filled_doc.save(buffer)
+    return buffer.getvalue()
+
+
+def bench(label, fn, iterations):
+    fn()  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        output = fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{label:<22} mean {1000 * sum(timings) / len(timings):8.2f} ms   "
+          f"p95 {1000 * timings[int(0.95 * (len(timings) - 1))]:8.2f} ms   {len(output):>8} bytes")
+    return sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--week", default="1")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    path = f'resources/Skills Boot Camp Week {args.week} Group 1 Timesheet.docx'
+    submission = sample_submission()
+
+    start = time.perf_counter()
+    compiled = compile_template(path)
+    print(f"compile (once per template change): {1000 * (time.perf_counter() - start):.2f} ms, "
+          f"{len(compiled.placeholders)} placeholders")
+
+    legacy = bench("python-docx fill+save", lambda: legacy_fill(path, submission), args.iterations)
+    compiled_time = bench("compiled render", lambda: render(compiled, submission), args.iterations)
+    print(f"speed-up: {legacy / compiled_time:.1f}x")
+
+    compact_png, report = encode_signature(sample_canvas())
+    compact = replace(submission, signature_png=compact_png)
+    print(f"signature: {report['before_bytes']} -> {report['after_bytes']} bytes, "
+          f"document: {len(render(compiled, submission))} -> {len(render(compiled, compact))} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-click rerun latency on page 2 (attendance grid), measured with Streamlit's AppTest.
+
+    python benchmarks/bench_rerun.py [--clicks 40]
+
+Every checkbox click is timed twice: as a full script rerun (what every click cost
+before the grid became a fragment) and as a fragment-only rerun, which is what the
+browser asks for when a widget inside a fragment changes. AppTest itself always
+reruns the whole script, so the fragment runs are replayed here by handing the
+runner the fragment ids the previous run registered.
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.runtime.fragment import MemoryFragmentStorage  # noqa: E402
+from streamlit.testing.v1 import AppTest, local_script_runner  # noqa: E402
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# One fragment store shared by every AppTest run, and the fragment ids the next run should replay
+fragments = MemoryFragmentStorage()
+fragment_queue = []
+local_script_runner.MemoryFragmentStorage = lambda: fragments
+_rerun_data = local_script_runner.RerunData
+local_script_runner.RerunData = lambda **kw: replace(_rerun_data(**kw), fragment_id_queue=list(fragment_queue))
+
+
+def page_two():
+    os.environ.setdefault("week", "1")
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["page"] = 2
+    at.session_state["week"] = 1
+    at.session_state["start_date"] = "12/10/2026"
+    at.session_state["end_date"] = "16/10/2026"
+    return at.run()
+
+
+def percentile(timings, p):
+    timings = sorted(timings)
+    return timings[int(p * (len(timings) - 1))]
+
+
+def clicks(at, count, fragment_only):
+    """Toggle attendance checkboxes one at a time, timing the rerun each click triggers."""
+    timings = []
+    for n in range(count):
+        fragment_queue[:] = list(fragments._fragments) if fragment_only else []
+        checkbox = at.checkbox[n % len(at.checkbox)]
+        checkbox.set_value(not checkbox.value)
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+        assert not at.exception, at.exception
+    fragment_queue.clear()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=40)
+    args = parser.parse_args()
+
+    at = page_two()
+    print(f"page 2: {len(at.checkbox)} checkboxes, {len(fragments._fragments)} fragment(s)")
+    modes = [("full rerun", False)] + ([("fragment rerun", True)] if fragments._fragments else [])
+    for label, fragment_only in modes:
+        timings = clicks(at, args.clicks, fragment_only)
+        print(f"{label:<16} mean {1000 * sum(timings) / len(timings):7.1f} ms   "
+              f"p50 {1000 * percentile(timings, 0.5):7.1f} ms   p95 {1000 * percentile(timings, 0.95):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
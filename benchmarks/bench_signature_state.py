@@ -0,0 +1,58 @@
+"""Per-session signature state: full canvas array vs packed ink bitmask.
+
+    python benchmarks/bench_signature_state.py [--iterations 1000]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from signature import canvas_png_bytes, has_ink, ink_mask, pack_ink, stroke_fingerprint, unpack_ink  # noqa: E402
+
+
+def sample_canvas():
+    """What st_canvas hands back for a 400x150 canvas with a signature on it."""
+    canvas = np.zeros((150, 400, 4), dtype=np.uint8)
+    canvas[60:90, 40:360] = (0, 0, 0, 255)
+    return canvas
+
+
+def sample_json():
+    return {"objects": [{"type": "path", "path": [["M", 40, 60]] + [["Q", x, 70, x + 1, 75] for x in range(40, 360, 4)]}]}
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return 1e6 * (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    canvas, json_data = sample_canvas(), sample_json()
+    packed = pack_ink(canvas)
+    strokes = stroke_fingerprint(sample_json())  # from an earlier rerun: equal, not the same objects
+
+    print(f"session state   full array {canvas.nbytes:>8} bytes   "
+          f"packed {len(pickle.dumps(packed)):>6} bytes (+ {len(pickle.dumps(strokes))} fingerprint)")
+    print(f"as float64      full array {canvas.astype(float).nbytes:>8} bytes")
+    old = timed(lambda: not np.all(canvas == 255), args.iterations)
+    new = timed(lambda: stroke_fingerprint(json_data) == strokes or has_ink(packed), args.iterations)
+    print(f"per rerun       np.all check {old:8.1f} us   fingerprint/has_ink {new:8.1f} us")
+    print(f"on stroke change ink_mask {timed(lambda: ink_mask(canvas), args.iterations):8.1f} us   "
+          f"pack_ink {timed(lambda: pack_ink(canvas), args.iterations):8.1f} us")
+    print(f"at submit       unpack_ink {timed(lambda: unpack_ink(packed), args.iterations):8.1f} us   "
+          f"canvas_png_bytes {timed(lambda: canvas_png_bytes(canvas), args.iterations):8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Cold-start report: import time and first paint of page 1, in fresh interpreters.
+
+    python benchmarks/bench_startup.py [--runs 5]
+
+Each run starts a new Python process with -X importtime, drives app.py through
+page 1 (dates entered, schedule table shown) with Streamlit's AppTest and
+reports how long that took, which heavy modules were imported by then and the
+slowest imports.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "numpy", "PIL", "docx", "lxml", "msal", "openpyxl", "streamlit_drawable_canvas", "requests")
+
+CHILD = r"""
+import json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, %(root)r)
+from datetime import date
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(os.path.join(%(root)r, "app.py"), default_timeout=120).run()
+at.date_input[0].set_value(date(2026, 10, 12))
+at.date_input[1].set_value(date(2026, 10, 16))
+at.run()
+painted = time.perf_counter()
+assert not at.exception and at.markdown, at.exception
+print(json.dumps({"streamlit_import": imported - start, "first_paint": painted - start,
+                  "page1_runs": painted - imported,
+                  "modules": sorted(m for m in %(heavy)r if m in sys.modules)}))
+"""
+
+
+def run_once():
+    env = dict(os.environ, week=os.environ.get("week", "1"))
+    child = CHILD % {"root": ROOT, "heavy": HEAVY}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", child], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # "import time: self [us] | cumulative | imported package" -> top-level imports only
+    imports = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            _, cumulative, name = line.split("|")
+            if not name.startswith("  "):
+                imports[name.strip()] = int(cumulative) / 1e6
+    report["imports"] = imports
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r["first_paint"])
+    for key in ("streamlit_import", "page1_runs", "first_paint"):
+        values = sorted(r[key] for r in runs)
+        print(f"{key:<18} best {1000 * values[0]:7.0f} ms   median {1000 * values[len(values) // 2]:7.0f} ms")
+    print(f"heavy modules loaded by first paint: {', '.join(best['modules']) or 'none'}")
+    print("slowest top-level imports (best run):")
+    for name, seconds in sorted(best["imports"].items(), key=lambda item: -item[1])[:12]:
+        print(f"  {name:<32} {1000 * seconds:7.1f} ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
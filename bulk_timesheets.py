@@ -0,0 +1,238 @@
+"""Generate (and upload) timesheets for a whole cohort from a roster.
+
+    python bulk_timesheets.py roster.xlsx --week 3 --signature tutor.png --dry-run --out out/
+
+The roster is a .xlsx or .csv file with a header row containing learner_name,
+start_date, end_date and mon_am, mon_pm ... fri_am, fri_pm attendance columns
+(P/Present/Y or A/Absent/N). Optional columns: signature (path to an image) and
+mon_signed ... fri_signed; by default a day is signed when the learner attended it.
+A learner listed twice (same file name) is skipped after the first row.
+
+Uploads never overwrite: an existing file is kept and the new one stored under a
+numbered name. Each upload is recorded in the submission index (--db), so
+`submission_index.py` lists bulk-generated timesheets too, and a row identical to
+one already uploaded for the week is skipped.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+
+import numpy as np
+from dotenv import load_dotenv
+from PIL import Image as PILImage
+
+from graph_client import BATCH_LIMIT, GraphError
+from signature import compact_signature
+from submission_index import SubmissionIndex, content_hash
+from template_registry import TemplateRegistry
+from template_render import Submission, compile_template, render, timesheet_file_name
+from week_calendar import get_weekday_dates
+
+DAYS = ("mon", "tue", "wed", "thu", "fri")
+PRESENT = {"p", "present", "y", "yes", "1", "true", "✔"}
+ABSENT = {"a", "absent", "n", "no", "0", "false"}
+
+
+def read_roster(path):
+    """Yield one dict per roster row, keyed by lower-cased header. xlsx rows are streamed."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                yield {(k or "").strip().lower(): v for k, v in row.items()}
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h or "").strip().lower() for h in next(rows, ())]
+        for values in rows:
+            if any(v not in (None, "") for v in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value).strip(), "%d/%m/%Y").date()
+
+
+def parse_mark(value):
+    """Attendance cell -> (present, absent)."""
+    text = str(value if value is not None else "").strip().lower()
+    return text in PRESENT, text in ABSENT
+
+
+def load_signature(path):
+    with PILImage.open(path) as image:
+        return compact_signature(np.asarray(image.convert("RGBA")))
+
+
+def build_submission(row, default_signature, declaration_date, signatures):
+    name = str(row.get("learner_name") or "").strip()
+    if not name:
+        raise ValueError("missing learner_name")
+    dates = get_weekday_dates(parse_date(row["start_date"]), parse_date(row["end_date"]))
+
+    attendance, signed_rows = [], []
+    for day in DAYS:
+        am_present, am_absent = parse_mark(row.get(f"{day}_am"))
+        pm_present, pm_absent = parse_mark(row.get(f"{day}_pm"))
+        attendance.append((am_present, am_absent, pm_present, pm_absent))
+        signed = row.get(f"{day}_signed")
+        signed_rows.append(parse_mark(signed)[0] if signed not in (None, "") else am_present or pm_present)
+
+    signature_path = row.get("signature")
+    if signature_path:
+        if signature_path not in signatures:
+            signatures[signature_path] = load_signature(signature_path)
+        signature_png = signatures[signature_path]
+    elif default_signature is not None:
+        signature_png = default_signature
+    else:
+        raise ValueError("no signature image (add a signature column or pass --signature)")
+
+    return Submission(name, declaration_date, dates, attendance, signed_rows, signature_png)
+
+
+# Each worker process compiles the template once
+_compiled = None
+
+
+def _init_worker(path):
+    global _compiled
+    _compiled = compile_template(path)
+
+
+def _render(task):
+    week, submission = task
+    return timesheet_file_name(week, submission.learner_name), render(_compiled, submission)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("roster", help="roster/attendance workbook (.xlsx) or .csv")
+    parser.add_argument("--week", required=True, type=int)
+    parser.add_argument("--group", default=1, type=int)
+    parser.add_argument("--template", help="template .docx (default: the registered template for week/group)")
+    parser.add_argument("--signature", help="signature image for rows without their own")
+    parser.add_argument("--declaration-date", default=date.today().strftime("%d-%m-%Y"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--dry-run", action="store_true", help="write documents locally instead of uploading")
+    parser.add_argument("--out", default="out", help="output directory for --dry-run")
+    parser.add_argument("--folder", help="SharePoint folder (default: PARENT_FOLDER_PATH)")
+    parser.add_argument("--db", default=os.getenv("SUBMISSION_QUEUE_DB", "submissions.db"),
+                        help="submission index to record uploads in")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    try:
+        path = args.template or TemplateRegistry().path(args.week, args.group)
+    except LookupError as e:
+        parser.error(str(e))
+    default_signature = load_signature(args.signature) if args.signature else None
+    signatures = {}
+    seen = {}  # file name -> roster line, so two rows never write (or upload) the same document
+    index = None if args.dry_run else SubmissionIndex(args.db)
+    already_uploaded = 0
+
+    def tasks():
+        nonlocal already_uploaded
+        for line, row in enumerate(read_roster(args.roster), start=2):
+            try:
+                submission = build_submission(row, default_signature, args.declaration_date, signatures)
+            except (KeyError, ValueError, OSError) as e:
+                print(f"\nrow {line}: skipped ({e})", file=sys.stderr)
+                continue
+            name = timesheet_file_name(args.week, submission.learner_name)
+            if name in seen:
+                print(f"\nrow {line}: skipped (same learner as row {seen[name]})", file=sys.stderr)
+                continue
+            seen[name] = line
+            digest = content_hash(submission)
+            if index is not None and index.find(args.week, args.group, submission.learner_name, digest):
+                already_uploaded += 1
+                continue
+            yield args.week, submission, digest
+
+    if args.dry_run:
+        os.makedirs(args.out, exist_ok=True)
+    else:
+        from graph_client import get_graph_client
+        client = get_graph_client()
+        drive_id = os.getenv("DRIVE_ID")
+        folder = args.folder or os.getenv("PARENT_FOLDER_PATH")
+    pending, failed = [], []
+
+    def flush():
+        try:
+            results = client.upload_batch(drive_id, folder, [(name, content) for name, content, _ in pending],
+                                          conflict_behavior="rename")
+        except GraphError as e:
+            # e.g. a missing folder or a rejected $batch: count the batch as failed and keep going
+            print(f"\nbatch of {len(pending)} failed: {e}", file=sys.stderr)
+            failed.extend((name, e.status_code) for name, _, _ in pending)
+            pending.clear()
+            return
+        for (name, status, stored_name), (_, _, task) in zip(results, pending):
+            if status in (200, 201):
+                _, submission, digest = task
+                index.record(args.week, args.group, submission.learner_name, digest, uuid.uuid4().hex, name,
+                             status="done", stored_name=stored_name or name)
+            else:
+                failed.append((name, status))
+        pending.clear()
+
+    start = time.perf_counter()
+    done = 0
+    rows = tasks()
+    # At most `window` rows are read ahead of the writer/uploader, so the roster stays
+    # streamed and finished documents don't pile up while a batch uploads
+    window = BATCH_LIMIT * args.workers
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(path,)) as pool:
+        def top_up():
+            for task in islice(rows, window - len(in_flight)):
+                in_flight.append((pool.submit(_render, task[:2]), task))
+
+        top_up()
+        while in_flight:
+            future, task = in_flight.popleft()
+            name, content = future.result()
+            if len(in_flight) < window // 2:
+                top_up()
+            if args.dry_run:
+                with open(os.path.join(args.out, name), "wb") as f:
+                    f.write(content)
+            else:
+                pending.append((name, content, task))
+                if len(pending) >= BATCH_LIMIT:
+                    flush()
+            done += 1
+            elapsed = time.perf_counter() - start
+            print(f"\r{done} documents, {done / elapsed:.1f} docs/s", end="", flush=True)
+        if pending:
+            flush()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n{done} timesheets in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} docs/s)")
+    if already_uploaded:
+        print(f"{already_uploaded} unchanged since their last upload, skipped")
+    for name, status in failed:
+        print(f"upload failed: {name} ({status})", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""A small in-process stand-in for the Graph drive endpoints the app uses.
+
+    python fake_graph.py --port 8765 --folder "Timesheets/Week 1"
+
+then run the app with GRAPH_BASE_URL=http://127.0.0.1:8765/v1.0. Faults can be
+queued with fail_next() to exercise throttling and retry behaviour offline.
+"""
+import argparse
+import base64
+import json
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ITEM_PATH = re.compile(r"^/v1\.0/drives/(?P<drive>[^/]+)/root:/(?P<path>.+?)(?::/(?P<action>content|createUploadSession))?$")
+UPLOAD_PATH = re.compile(r"^/upload/(?P<session>\d+)$")
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class FakeGraph:
+    """Thread-safe fake drive: folders, files, upload sessions and injectable faults."""
+
+    def __init__(self, folders=(), host="127.0.0.1", port=0, latency=0.0):
+        self.folders = {f.strip("/") for f in folders}
+        self.files = {}  # "folder/name" -> bytes
+        self.requests = []  # (method, path, status)
+        self.connections = 0  # TCP connections accepted, to check keep-alive pooling
+        self.latency = latency  # seconds added to every response
+        self.lock = threading.Lock()
+        self._faults = []  # [(status, retry_after)]
+        self._sessions = {}  # id -> {"path", "data", "total"}
+        self._next_session = 1
+
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1.0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail_next(self, count=1, status=429, retry_after=0):
+        """Answer the next `count` requests with `status` (and a Retry-After header)."""
+        with self.lock:
+            self._faults.extend([(status, retry_after)] * count)
+
+    def _take_fault(self):
+        with self.lock:
+            return self._faults.pop(0) if self._faults else None
+
+    def _record(self, method, path, status):
+        with self.lock:
+            self.requests.append((method, path, status))
+
+    def handle(self, method, path, body=b"", headers=None):
+        """Answer one Graph request. Returns (status, json payload or None, extra headers)."""
+        headers = headers or {}
+        if self.latency:
+            threading.Event().wait(self.latency)
+        fault = self._take_fault()
+        if fault is not None:
+            status, retry_after = fault
+            return status, {"error": {"code": "throttled"}}, {"Retry-After": str(retry_after)}
+
+        url = urllib.parse.urlsplit(path)
+        path = urllib.parse.unquote(url.path)
+        conflict = urllib.parse.parse_qs(url.query).get("@microsoft.graph.conflictBehavior", ["replace"])[0]
+        if not path.startswith("/v1.0") and not path.startswith("/upload/"):
+            path = "/v1.0" + path  # $batch sub-requests are relative to the version root
+
+        upload = UPLOAD_PATH.match(path)
+        if upload and method == "PUT":
+            return self._upload_chunk(int(upload.group("session")), body, headers.get("Content-Range", ""))
+        if path == "/v1.0/$batch" and method == "POST":
+            return self._batch(json.loads(body))
+
+        item = ITEM_PATH.match(path)
+        if not item:
+            return 404, {"error": {"code": "itemNotFound"}}, {}
+        item_path, action = item.group("path").strip("/"), item.group("action")
+
+        if method == "GET" and action is None:
+            if item_path in self.folders:
+                return 200, {"id": item_path, "folder": {}}, {}
+            return 404, {"error": {"code": "itemNotFound"}}, {}
+        if method == "PUT" and action == "content":
+            return self._store(item_path, body, conflict)
+        if method == "POST" and action == "createUploadSession":
+            item = (json.loads(body) if body else {}).get("item") or {}
+            with self.lock:
+                session_id = self._next_session
+                self._next_session += 1
+                self._sessions[session_id] = {"path": item_path, "data": bytearray(),
+                                              "conflict": item.get("@microsoft.graph.conflictBehavior", "replace")}
+            host, port = self.server.server_address[:2]
+            return 200, {"uploadUrl": f"http://{host}:{port}/upload/{session_id}"}, {}
+        return 405, {"error": {"code": "notSupported"}}, {}
+
+    def _store(self, item_path, data, conflict="replace"):
+        """Write a file, honouring @microsoft.graph.conflictBehavior (replace, rename or fail)."""
+        folder = item_path.rsplit("/", 1)[0] if "/" in item_path else ""
+        if folder not in self.folders:
+            return 404, {"error": {"code": "itemNotFound"}}, {}
+        with self.lock:
+            existed = item_path in self.files
+            if existed and conflict == "fail":
+                return 409, {"error": {"code": "nameAlreadyExists"}}, {}
+            if existed and conflict == "rename":
+                # Like OneDrive: 'name.docx' -> 'name 1.docx', 'name 2.docx', ...
+                stem, dot, extension = item_path.rpartition(".") if "." in item_path else (item_path, "", "")
+                n = 1
+                while f"{stem} {n}{dot}{extension}" in self.files:
+                    n += 1
+                item_path, existed = f"{stem} {n}{dot}{extension}", False
+            self.files[item_path] = bytes(data)
+        return (200 if existed else 201), {"name": item_path.rsplit("/", 1)[-1], "size": len(data)}, {}
+
+    def _upload_chunk(self, session_id, chunk, content_range):
+        session = self._sessions.get(session_id)
+        match = CONTENT_RANGE.match(content_range)
+        if session is None or not match:
+            return 404, {"error": {"code": "itemNotFound"}}, {}
+        start, end, total = (int(g) for g in match.groups())
+        if start != len(session["data"]) or end - start + 1 != len(chunk):
+            return 416, {"nextExpectedRanges": [f"{len(session['data'])}-"]}, {}
+        session["data"].extend(chunk)
+        if len(session["data"]) < total:
+            return 202, {"nextExpectedRanges": [f"{len(session['data'])}-"]}, {}
+        with self.lock:
+            self._sessions.pop(session_id, None)
+        return self._store(session["path"], session["data"], session["conflict"])
+
+    def _batch(self, payload):
+        responses = []
+        for request in payload.get("requests", []):
+            body = request.get("body") or b""
+            if isinstance(body, str):
+                body = base64.b64decode(body)  # non-JSON bodies are base64 encoded
+            status, result, headers = self.handle(request["method"], request["url"], body, request.get("headers"))
+            responses.append({"id": request["id"], "status": status, "headers": headers, "body": result})
+        return 200, {"responses": responses}, {}
+
+    def _handler(self):
+        graph = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse sockets
+
+            def setup(self):
+                super().setup()
+                with graph.lock:
+                    graph.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload, headers = graph.handle(self.command, self.path, body, dict(self.headers))
+
+                data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if payload is not None:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                graph._record(self.command, self.path, status)
+
+            do_GET = do_PUT = do_POST = _dispatch
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Graph drive")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--folder", action="append", default=[], help="folder that exists (repeatable)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    graph = FakeGraph(folders=args.folder, port=args.port, latency=args.latency)
+    print(f"Fake Graph listening on {graph.url}")
+    try:
+        graph.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
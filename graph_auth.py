@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+from instrumentation import count, register_collector, span
+
+GRAPH_SCOPES = ["https://graph.microsoft.com/.default"]
+
+
+class TokenError(Exception):
+    """Raised when Azure AD refuses to issue a Graph access token."""
+
+
+class TokenProvider:
+    """Thread-safe, lazily initialised Graph access token for the app registration.
+
+    One msal.ConfidentialClientApplication (and therefore one token cache) is kept for
+    the life of the process. Tokens are reused until `refresh_margin` seconds before
+    they expire, at which point the next caller fetches a new one while the others wait.
+    """
+
+    def __init__(self, client_id, client_secret, tenant_id, scopes=GRAPH_SCOPES, refresh_margin=300):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.tenant_id = tenant_id
+        self.scopes = list(scopes)
+        self.refresh_margin = refresh_margin
+
+        self._app = None
+        self._lock = threading.Lock()
+        self._token = None  # (access_token, expires_at)
+
+        self.fetch_count = 0
+        self.refresh_count = 0
+        self.last_fetch_seconds = None
+        self.total_fetch_seconds = 0.0
+
+    def _client(self):
+        if self._app is None:
+            import msal  # Deferred: only needed once the first upload happens
+            self._app = msal.ConfidentialClientApplication(
+                client_id=self.client_id,
+                client_credential=self.client_secret,
+                authority=f"https://login.microsoftonline.com/{self.tenant_id}",
+            )
+        return self._app
+
+    def _fresh(self, token):
+        return token is not None and time.time() < token[1] - self.refresh_margin
+
+    def get_token(self):
+        token = self._token
+        if self._fresh(token):
+            count("graph_token_requests_total", source="memory")
+            return token[0]
+
+        with self._lock:
+            # Another thread may have refreshed it while we waited
+            if self._fresh(self._token):
+                return self._token[0]
+
+            with span("token_acquire") as fields:
+                start = time.perf_counter()
+                result = self._client().acquire_token_for_client(scopes=self.scopes)
+                elapsed = time.perf_counter() - start
+                fields["token_source"] = result.get("token_source")
+
+                if "access_token" not in result:
+                    raise TokenError(f"Failed to acquire token: {result.get('error')} {result.get('error_description')}")
+            count("graph_token_requests_total", source=result.get("token_source") or "identity_provider")
+
+            if result.get("token_source") != "cache":
+                if self._token is not None:
+                    self.refresh_count += 1
+                self.fetch_count += 1
+                self.last_fetch_seconds = elapsed
+                self.total_fetch_seconds += elapsed
+
+            self._token = (result["access_token"], time.time() + int(result.get("expires_in", 0)))
+            return self._token[0]
+
+    def invalidate(self):
+        """Drop the cached token, e.g. after Graph answers 401."""
+        with self._lock:
+            self._token = None
+
+    def metrics(self):
+        return {
+            "fetch_count": self.fetch_count,
+            "refresh_count": self.refresh_count,
+            "last_fetch_seconds": self.last_fetch_seconds,
+            "avg_fetch_seconds": self.total_fetch_seconds / self.fetch_count if self.fetch_count else None,
+            "expires_at": self._token[1] if self._token else None,
+        }
+
+    def gauges(self):
+        metrics = self.metrics()
+        return [
+            ("graph_token_fetches", {}, metrics["fetch_count"]),
+            ("graph_token_refreshes", {}, metrics["refresh_count"]),
+            ("graph_token_last_fetch_seconds", {}, metrics["last_fetch_seconds"]),
+            ("graph_token_avg_fetch_seconds", {}, metrics["avg_fetch_seconds"]),
+            ("graph_token_expires_at", {}, metrics["expires_at"]),
+        ]
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_token_provider():
+    """The process-wide provider, built from CLIENT_ID/CLIENT_SECRET/TENANT_ID on first use."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                provider = TokenProvider(
+                    client_id=os.getenv("CLIENT_ID"),
+                    client_secret=os.getenv("CLIENT_SECRET"),
+                    tenant_id=os.getenv("TENANT_ID"),
+                )
+                register_collector(provider.gauges)
+                _provider = provider
+    return _provider
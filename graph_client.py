@@ -0,0 +1,260 @@
+import base64
+import os
+import random
+import threading
+import time
+import urllib.parse
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from graph_auth import get_token_provider
+from instrumentation import count, span
+
+GRAPH_URL = "https://graph.microsoft.com/v1.0"
+
+RETRY_STATUSES = (429, 502, 503, 504)
+SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024  # Graph rejects PUT .../content above 4 MB
+CHUNK_SIZE = 10 * 320 * 1024  # Upload session chunks must be multiples of 320 KiB
+BATCH_LIMIT = 20  # requests per JSON $batch
+BATCH_BYTES = 3 * 1024 * 1024  # encoded body budget per $batch
+CONFLICT_BEHAVIOR = "@microsoft.graph.conflictBehavior"  # replace (Graph's default), rename or fail
+
+
+class GraphError(Exception):
+    """A Graph request that failed after retries."""
+
+    def __init__(self, message, status_code=None, text=""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.text = text
+
+
+def parse_retry_after(value):
+    """Seconds to wait for a Retry-After value (delay in seconds or an HTTP date), or None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(response):
+    """Seconds to wait according to a response's Retry-After header, or None."""
+    return parse_retry_after(response.headers.get("Retry-After"))
+
+
+class GraphClient:
+    """Pooled Graph HTTP client with timeouts, throttling back-off and chunked uploads."""
+
+    def __init__(self, token_provider, base_url=GRAPH_URL, timeout=(5, 60), max_retries=5,
+                 backoff=0.5, max_backoff=30, pool_size=10,
+                 simple_upload_limit=SIMPLE_UPLOAD_LIMIT, chunk_size=CHUNK_SIZE):
+        self.token_provider = token_provider
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.simple_upload_limit = simple_upload_limit
+        self.chunk_size = chunk_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._folders = set()  # (drive_id, folder_path) known to exist
+        self._lock = threading.Lock()
+        self.retry_count = 0
+
+    def _sleep_before_retry(self, attempt, response=None):
+        count("graph_retries_total", status=response.status_code if response is not None else "connection")
+        delay = retry_after_seconds(response) if response is not None else None
+        if delay is None:
+            delay = min(self.backoff * (2 ** attempt), self.max_backoff) * random.uniform(0.5, 1.0)
+        with self._lock:
+            self.retry_count += 1
+        time.sleep(delay)
+
+    def request(self, method, url, authorize=True, **kwargs):
+        """Send a request, retrying throttled/unavailable responses and dropped connections."""
+        if not url.startswith("http"):
+            url = self.base_url + url
+        kwargs.setdefault("timeout", self.timeout)
+        extra_headers = kwargs.pop("headers", None) or {}
+        reauthorized = False
+        attempt = 0
+
+        while True:
+            headers = dict(extra_headers)
+            if authorize:
+                headers["Authorization"] = f"Bearer {self.token_provider.get_token()}"
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+
+            if response.status_code == 401 and authorize and not reauthorized:
+                # Token revoked or expired early: fetch a new one once
+                self.token_provider.invalidate()
+                reauthorized = True
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._sleep_before_retry(attempt, response)
+                attempt += 1
+                continue
+            return response
+
+    def _item_path(self, drive_id, *parts):
+        path = "/".join(urllib.parse.quote(p.strip("/")) for p in parts if p)
+        return f"/drives/{drive_id}/root:/{path}"
+
+    def ensure_folder(self, drive_id, folder_path):
+        """Check the folder exists, remembering the answer for the life of the client."""
+        key = (drive_id, folder_path)
+        if key in self._folders:
+            return
+        response = self.request("GET", self._item_path(drive_id, folder_path), params={"$select": "id,folder"})
+        if response.status_code != 200:
+            raise GraphError(f"Error fetching parent folder: {response.status_code}", response.status_code, response.text)
+        with self._lock:
+            self._folders.add(key)
+
+    def upload(self, drive_id, folder_path, file_name, content, conflict_behavior=None):
+        """Upload bytes to folder_path/file_name, returning the final Graph response.
+
+        With conflict_behavior="rename" an existing file is kept and Graph stores the
+        new one under a numbered name (reported as "name" in the response).
+        """
+        self.ensure_folder(drive_id, folder_path)
+        item_path = self._item_path(drive_id, folder_path, file_name)
+        if len(content) <= self.simple_upload_limit:
+            params = {CONFLICT_BEHAVIOR: conflict_behavior} if conflict_behavior else None
+            return self.request("PUT", item_path + ":/content", params=params, data=content)
+        return self._upload_session(item_path, content, conflict_behavior)
+
+    def _upload_session(self, item_path, content, conflict_behavior=None):
+        item = {CONFLICT_BEHAVIOR: conflict_behavior} if conflict_behavior else {}
+        response = self.request("POST", item_path + ":/createUploadSession", json={"item": item})
+        if response.status_code != 200:
+            raise GraphError(f"Error creating upload session: {response.status_code}", response.status_code, response.text)
+        upload_url = response.json()["uploadUrl"]
+
+        total = len(content)
+        offset = 0
+        while offset < total:
+            chunk = content[offset:offset + self.chunk_size]
+            end = offset + len(chunk) - 1
+            # The upload URL is pre-authorised; Graph rejects an Authorization header on it
+            response = self.request("PUT", upload_url, authorize=False, data=chunk, headers={
+                "Content-Length": str(len(chunk)),
+                "Content-Range": f"bytes {offset}-{end}/{total}",
+            })
+            if response.status_code == 202:
+                ranges = response.json().get("nextExpectedRanges") or [f"{end + 1}-"]
+                offset = int(ranges[0].split("-")[0])
+            elif response.status_code in (200, 201):
+                return response
+            else:
+                raise GraphError(f"Error uploading chunk: {response.status_code}", response.status_code, response.text)
+        return response
+
+
+    def upload_batch(self, drive_id, folder_path, files, conflict_behavior=None):
+        """Upload many small files through JSON $batch requests.
+
+        `files` is a list of (file_name, content) pairs, each under the simple upload
+        limit. Returns one (file_name, status_code, stored_name) triple per file, in the
+        order given; stored_name is the name Graph saved it under (None on failure).
+        Throttled members are resent on their own. conflict_behavior works as in upload().
+        """
+        self.ensure_folder(drive_id, folder_path)
+        query = f"?{CONFLICT_BEHAVIOR}={conflict_behavior}" if conflict_behavior else ""
+        pending = list(enumerate(files))
+        results = [None] * len(pending)
+        attempt = 0
+        while pending:
+            retry = []
+            retry_after = 0.0
+            for batch in self._batches(pending):
+                requests_json = [{
+                    "id": str(i),
+                    "method": "PUT",
+                    "url": self._item_path(drive_id, folder_path, name) + ":/content" + query,
+                    "headers": {"Content-Type": "application/octet-stream"},
+                    "body": base64.b64encode(content).decode("ascii"),
+                } for i, (_, (name, content)) in enumerate(batch)]
+                response = self.request("POST", "/$batch", json={"requests": requests_json})
+                if response.status_code != 200:
+                    raise GraphError(f"Error sending batch: {response.status_code}", response.status_code, response.text)
+
+                for member in response.json()["responses"]:
+                    position, (name, content) = batch[int(member["id"])]
+                    if member["status"] in RETRY_STATUSES and attempt < self.max_retries:
+                        retry.append((position, (name, content)))
+                        headers = {k.lower(): v for k, v in (member.get("headers") or {}).items()}
+                        delay = parse_retry_after(headers.get("retry-after"))
+                        retry_after = max(retry_after, delay or 0.0)
+                    else:
+                        stored_name = (member.get("body") or {}).get("name") if member["status"] in (200, 201) else None
+                        results[position] = (name, member["status"], stored_name)
+
+            if retry:
+                if retry_after:
+                    time.sleep(retry_after)
+                else:
+                    self._sleep_before_retry(attempt)
+                attempt += 1
+            pending = retry
+        return results
+
+    def _batches(self, files):
+        # Graph caps a batch at 20 requests; also keep the base64 payload under ~4 MB
+        batch, size = [], 0
+        for position, (name, content) in files:
+            encoded = (len(content) + 2) // 3 * 4
+            if batch and (len(batch) == BATCH_LIMIT or size + encoded > BATCH_BYTES):
+                yield batch
+                batch, size = [], 0
+            batch.append((position, (name, content)))
+            size += encoded
+        if batch:
+            yield batch
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_graph_client():
+    """The process-wide client; GRAPH_BASE_URL can point it at a local fake Graph."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GraphClient(get_token_provider(), base_url=os.getenv("GRAPH_BASE_URL", GRAPH_URL))
+    return _client
+
+
+def upload_to_sharepoint(drive_id, parent_folder_path, file_name, content, conflict_behavior="rename"):
+    """Upload a filled timesheet with the shared client and return Graph's response.
+
+    A learner's earlier upload is never overwritten: by default a new version is
+    stored alongside it under a numbered name.
+    """
+    with span("upload_to_sharepoint") as fields:
+        fields["bytes"] = len(content)
+        response = get_graph_client().upload(drive_id, parent_folder_path, file_name, content, conflict_behavior)
+        fields["status_code"] = response.status_code
+    count("graph_uploads_total", status=response.status_code)
+    return response
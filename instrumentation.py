@@ -0,0 +1,230 @@
+"""Timing spans and counters for the submission hot path.
+
+    with span("upload_to_sharepoint") as fields:
+        fields["bytes"] = len(content)
+        ...
+    count("submit_total", result="queued")
+
+Every span feeds an in-process histogram (<name>_seconds) and every error a
+<name>_errors_total counter, so the aggregates cost a dict update and are always
+on. Figures other modules already keep (queue depth, token fetches, cache hits)
+are published as gauges by collector callbacks, read when metrics are scraped:
+
+    register_collector(lambda: [("submission_queue_depth", {}, queue.metrics()["depth"])])
+
+Configured from the environment on first use:
+
+    INSTRUMENTATION_LOG           JSON lines file for individual spans/events ("-" for stderr)
+    INSTRUMENTATION_SAMPLE_RATE   fraction of spans/events written to the log (default 1.0;
+                                  errors are always written)
+    METRICS_PORT                  serve the aggregates in Prometheus text format on /metrics
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class JsonLinesSink:
+    """Append one JSON object per line to a file (or stderr for '-')."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = sys.stderr if path == "-" else open(path, "a", buffering=1, encoding="utf-8")
+
+    def write(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+class Instrumentation:
+    """Thread-safe counters and latency histograms, plus an optional sampled log sink."""
+
+    def __init__(self, sink=None, sample_rate=1.0):
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._collectors = []  # callables returning [(name, labels dict, value), ...]
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def _write(self, record, force=False):
+        if self.sink is not None and (force or self._sampled()):
+            self.sink.write({"ts": time.time(), **record})
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * len(BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the block. Yields a dict; anything put in it is added to the log record."""
+        fields = {}
+        error = None
+        start = time.perf_counter()
+        try:
+            yield fields
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(f"{name}_seconds", elapsed, **labels)
+            if error is not None:
+                self.count(f"{name}_errors_total", **labels)
+            self._write({"type": "span", "name": name, "seconds": elapsed, **labels, **fields,
+                         **({"error": repr(error)} if error is not None else {})}, force=error is not None)
+
+    def add_collector(self, collect):
+        """Publish `collect()`'s (name, labels, value) triples as gauges on every snapshot/scrape."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def _gauges(self):
+        with self._lock:
+            collectors = list(self._collectors)
+        gauges = []
+        for collect in collectors:
+            try:
+                gauges.extend((name, tuple(sorted(labels.items())), value)
+                              for name, labels, value in collect() if value is not None)
+            except Exception:
+                self.count("metrics_collector_errors_total")
+        return sorted(gauges, key=lambda gauge: gauge[:2])
+
+    def event(self, name, **fields):
+        """A structured log record with no timing (sampled like spans)."""
+        self._write({"type": "event", "name": name, **fields})
+
+    def snapshot(self):
+        """Aggregates as plain data: counters and gauges as (labels, value) pairs, spans as
+        count/sum/mean per label set."""
+        gauges = {}
+        for name, labels, value in self._gauges():
+            gauges.setdefault(name, []).append((dict(labels), value))
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append((dict(labels), value))
+            spans = {}
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                total, n = histogram[-2], histogram[-1]
+                spans.setdefault(name, []).append({**dict(labels), "count": n, "sum": total, "mean": total / n})
+        return {"counters": counters, "gauges": gauges, "spans": spans}
+
+    def render_prometheus(self):
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        typed = set()
+        for name, labels, value in self._gauges():
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{label_text(labels)} {value}")
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, n in zip(BUCKETS, histogram):
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', le)])} {n}")
+                lines.append(f"{name}_sum{label_text(labels)} {histogram[-2]}")
+                lines.append(f"{name}_count{label_text(labels)} {histogram[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(instrumentation, port, host="0.0.0.0"):
+    """Serve instrumentation.render_prometheus() on http://host:port/metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = instrumentation.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+_instrumentation = None
+_instrumentation_lock = threading.Lock()
+
+
+def get_instrumentation():
+    """The process-wide instance, configured from the environment on first use."""
+    global _instrumentation
+    if _instrumentation is None:
+        with _instrumentation_lock:
+            if _instrumentation is None:
+                log_path = os.getenv("INSTRUMENTATION_LOG")
+                instrumentation = Instrumentation(
+                    sink=JsonLinesSink(log_path) if log_path else None,
+                    sample_rate=float(os.getenv("INSTRUMENTATION_SAMPLE_RATE", "1.0")),
+                )
+                port = os.getenv("METRICS_PORT")
+                if port:
+                    start_metrics_server(instrumentation, int(port))
+                _instrumentation = instrumentation
+    return _instrumentation
+
+
+def span(name, **labels):
+    return get_instrumentation().span(name, **labels)
+
+
+def count(name, value=1, **labels):
+    get_instrumentation().count(name, value, **labels)
+
+
+def event(name, **fields):
+    get_instrumentation().event(name, **fields)
+
+
+def register_collector(collect):
+    get_instrumentation().add_collector(collect)
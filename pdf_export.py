@@ -0,0 +1,202 @@
+"""Render a filled timesheet straight to PDF, offline (no Word, no conversion service).
+
+The PDF is drawn from the template snapshot (header, schedule, the declaration
+wording, attendance rows and tutor section) and the same Submission the .docx
+renderer fills: the week_calendar date mapping, the attendance ticks, the signed
+rows and the compacted signature PNG. Rendering runs
+in a small process pool so neither learner sessions nor queue threads hold the GIL
+while a page is laid out.
+
+PDF_WORKERS sets the pool size (default 2) and PDF_EXPORT_TIMEOUT how long a
+queue thread waits for one PDF, in seconds (default 60).
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from template_render import DATE_TOKENS, PARAGRAPH_TOKENS
+
+# Core PDF fonts only cover Latin-1; map the typographic characters templates use
+LATIN1 = str.maketrans({"–": "-", "—": "-", "‘": "'", "’": "'", "“": '"', "”": '"', "…": "...", "✔": "X"})
+
+SCHEDULE_WIDTHS = (22, 70, 32, 28, 28)  # mm, A4 with 15 mm margins
+ATTENDANCE_WIDTHS = (30, 30, 35, 35, 50)
+TUTOR_WIDTHS = (60, 40, 40, 40)
+
+PDF_TIMEOUT = float(os.getenv("PDF_EXPORT_TIMEOUT", "60"))
+
+
+def _text(value):
+    return str(value or "").translate(LATIN1).encode("latin-1", "replace").decode("latin-1")
+
+
+def pdf_file_name(docx_name):
+    """Timesheet_w3_Jane_Doe.docx -> Timesheet_w3_Jane_Doe.pdf"""
+    return os.path.splitext(docx_name)[0] + ".pdf"
+
+
+def _session(present, absent):
+    # Same precedence as the .docx ticks: present wins if both boxes were checked
+    return "Present" if present else "Absent" if absent else "-"
+
+
+def _paragraph(pdf, segments, values, signature):
+    """Write a template paragraph ([text, bold] segments), filling its placeholders.
+
+    learner_signature becomes the signature image, 50 mm wide like Inches(2) in the .docx.
+    """
+    for text, bold in segments:
+        pdf.set_font("Helvetica", "B" if bold else "", 10)
+        # PARAGRAPH_TOKENS has one group, so odd pieces are the placeholders
+        for i, piece in enumerate(PARAGRAPH_TOKENS.split(text.replace("\t", " "))):
+            if i % 2 and piece == "learner_signature":
+                pdf.ln()
+                pdf.image(signature, w=50)
+            elif piece:
+                pdf.write(5, _text(values[piece] if i % 2 else piece))
+    pdf.ln()
+    pdf.ln(2)
+
+
+def render_pdf(snapshot, submission, week):
+    """The filled timesheet as PDF bytes."""
+    from fpdf import FPDF
+
+    dates = submission.dates
+    signature = BytesIO(submission.signature_png)
+    values = {"start_date": dates.get("start_date"), "end_date": dates.get("end_date"),
+              "learner_name": submission.learner_name, "date": submission.declaration_date}
+
+    pdf = FPDF(format="A4")
+    pdf.set_margins(15, 15, 15)
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.set_title(_text(f"Skills Boot Camp Week {week} Timesheet - {submission.learner_name}"))
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(text=_text(f"Skills Boot Camp Week {week} Timesheet"), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=10)
+    header = DATE_TOKENS.sub(lambda m: dates.get(m.group(1)) or "", snapshot["weekly_timesheet_info"])
+    pdf.multi_cell(0, 6, _text(header), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(2)
+
+    pdf.set_font("Helvetica", size=8)
+    with pdf.table(col_widths=SCHEDULE_WIDTHS, line_height=pdf.font_size * 1.3, text_align="LEFT") as table:
+        for cells in snapshot["schedule"]:
+            row = table.row()
+            for cell in cells:
+                row.cell(_text(cell))
+    pdf.ln(4)
+
+    for segments in snapshot["declaration"]:
+        _paragraph(pdf, segments, values, signature)
+
+    pdf.set_font("Helvetica", size=10)
+    with pdf.table(col_widths=ATTENDANCE_WIDTHS, line_height=8, text_align="CENTER") as table:
+        row = table.row()
+        for heading in ("Day", "Date", "AM", "PM", "Learner Signature"):
+            row.cell(heading)
+        for idx, (day, date_key) in enumerate(snapshot["attendance_rows"]):
+            am_present, am_absent, pm_present, pm_absent = submission.attendance[idx]
+            row = table.row()
+            row.cell(_text(day))
+            row.cell(_text(dates.get(date_key)))
+            row.cell(_session(am_present, am_absent))
+            row.cell(_session(pm_present, pm_absent))
+            if submission.signed_rows[idx]:
+                row.cell(img=signature, img_fill_width=False)
+            else:
+                row.cell("Absent")
+    pdf.ln(4)
+
+    for segments in snapshot["closing"]:
+        _paragraph(pdf, segments, values, signature)
+
+    # Tutor section: left blank for the tutor, as in the uploaded .docx
+    if snapshot["tutor_table"]:
+        pdf.set_font("Helvetica", size=9)
+        with pdf.table(col_widths=TUTOR_WIDTHS, line_height=7, text_align="LEFT", first_row_as_headings=False) as table:
+            for cells in snapshot["tutor_table"]:
+                row = table.row()
+                for cell in cells:
+                    row.cell(_text(cell.replace("\n", " ")))
+    return bytes(pdf.output())
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    import fpdf  # noqa: F401  Imported once per worker, not on its first PDF
+
+
+def get_pdf_pool():
+    """Process-wide pool for PDF rendering; PDF_WORKERS sets its size (default 2).
+
+    Workers are forked, explicitly: 'spawn' and 'forkserver' (the default from
+    Python 3.14) re-run __main__ in every worker, and under Streamlit __main__ is
+    app.py. Forking from a threaded process is still a hazard: by the time a
+    Streamlit script creates the pool, the server and session threads exist, and a
+    worker can inherit a lock one of them held and hang on it. Workers only import
+    fpdf and lay out pages, which keeps that window small, and callers don't rely
+    on it being closed: results are awaited with PDF_TIMEOUT, and a pool that broke
+    or timed out is dropped with reset_pdf_pool() so the next PDF forks fresh workers.
+    Raises RuntimeError where fork isn't available (Windows).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if "fork" not in multiprocessing.get_all_start_methods():
+                    raise RuntimeError("PDF export needs the 'fork' start method")
+                pool = ProcessPoolExecutor(max_workers=int(os.getenv("PDF_WORKERS", "2")),
+                                           mp_context=multiprocessing.get_context("fork"),
+                                           initializer=_init_worker)
+                pool.submit(int)  # With fork, the first submit starts all the workers
+                _pool = pool
+    return _pool
+
+
+def reset_pdf_pool(pool):
+    """Drop `pool` if it is still the current one; the next PDF starts a new pool.
+
+    A worker that hung is left behind with the old pool rather than waited for.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_pdf(snapshot, submission, week):
+    """Start rendering in the pool; returns a Future of the PDF bytes.
+
+    A pool left broken by a crashed worker is replaced once before giving up.
+    """
+    pool = get_pdf_pool()
+    try:
+        future = pool.submit(render_pdf, snapshot, submission, week)
+    except BrokenProcessPool:
+        reset_pdf_pool(pool)
+        pool = get_pdf_pool()
+        future = pool.submit(render_pdf, snapshot, submission, week)
+    future.pool = pool  # pdf_result() resets the pool this PDF went to, not a newer one
+    return future
+
+
+def pdf_result(future, timeout=None):
+    """The PDF bytes from submit_pdf(), waiting at most `timeout` seconds (PDF_TIMEOUT).
+
+    If the worker crashed (BrokenProcessPool) or didn't answer in time (TimeoutError),
+    the pool is reset before the error is raised, so later PDFs don't fail the same way.
+    """
+    try:
+        return future.result(timeout=PDF_TIMEOUT if timeout is None else timeout)
+    except (BrokenProcessPool, TimeoutError):
+        reset_pdf_pool(future.pool)
+        raise
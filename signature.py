@@ -0,0 +1,101 @@
+from io import BytesIO
+
+import numpy as np
+from PIL import Image as PILImage
+
+
+def ink_mask(signature):
+    """Boolean mask of the pixels the learner actually drew on."""
+    rgba = np.asarray(signature)
+    if rgba.ndim != 3 or rgba.shape[2] < 4:
+        return rgba[..., :3].min(axis=-1) < 250
+    # The canvas is either transparent or painted white where nothing was drawn
+    return (rgba[..., 3] > 0) & (rgba[..., :3].min(axis=-1) < 250)
+
+
+def crop_to_ink(signature, padding=4):
+    """Trim the blank canvas around the strokes, keeping a few pixels of margin."""
+    rgba = np.asarray(signature)
+    mask = ink_mask(rgba)
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0:
+        return rgba
+    top, bottom = max(rows[0] - padding, 0), min(rows[-1] + padding + 1, rgba.shape[0])
+    left, right = max(cols[0] - padding, 0), min(cols[-1] + padding + 1, rgba.shape[1])
+    return rgba[top:bottom, left:right]
+
+
+def compact_signature(signature, width_inches=2, dpi=150):
+    """Crop, downscale and 1-bit palette-encode the canvas RGBA array, in memory.
+
+    The image is sized for its largest use (the declaration, `width_inches` wide) at
+    `dpi`; signed rows reuse the same picture at a smaller size. Ink is black and the
+    background transparent, so it sits cleanly on shaded table cells.
+    """
+    cropped = crop_to_ink(signature)
+    mask = PILImage.fromarray(ink_mask(cropped).astype('uint8') * 255, 'L')
+
+    max_width = int(width_inches * dpi)
+    if mask.width > max_width:
+        height = max(1, round(mask.height * max_width / mask.width))
+        mask = mask.resize((max_width, height), PILImage.LANCZOS)
+
+    # Two-colour palette: index 0 transparent background, index 1 black ink
+    image = mask.point(lambda v: 1 if v >= 128 else 0)
+    image.putpalette([255, 255, 255, 0, 0, 0])
+    buffer = BytesIO()
+    image.save(buffer, format="PNG", transparency=0, optimize=True, dpi=(dpi, dpi))
+    return buffer.getvalue()
+
+
+def canvas_png_bytes(signature):
+    """Size of the canvas as a full-size RGBA PNG, i.e. what each embed cost before compaction."""
+    buffer = BytesIO()
+    PILImage.fromarray(np.asarray(signature).astype('uint8'), 'RGBA').save(buffer, format="PNG")
+    return len(buffer.getvalue())
+
+
+def encode_signature(signature, before_bytes=None):
+    """Compacted PNG bytes for the canvas, plus a before/after size report.
+
+    'before' is what the full-size RGBA PNG used to cost per embed. Pass
+    `before_bytes` (canvas_png_bytes() of the canvas) when `signature` is not the
+    original canvas, e.g. unpack_ink() output, so the report measures what the
+    learner drew.
+    """
+    png = compact_signature(signature)
+    if before_bytes is None:
+        before_bytes = canvas_png_bytes(signature)
+    return png, {"before_bytes": before_bytes, "after_bytes": len(png)}
+
+
+def stroke_fingerprint(json_data):
+    """Cheap change detector for the canvas: (stroke count, last stroke), or None if blank.
+
+    Free drawing only ever adds a stroke or undoes the last one, so these two change
+    whenever the drawing does, including an undo followed by a stroke of the same
+    length. Comparing them costs a few microseconds, whatever was drawn before.
+    """
+    objects = (json_data or {}).get("objects") or []
+    return (len(objects), objects[-1]) if objects else None
+
+
+def pack_ink(signature):
+    """Compact session-state form of the canvas: its ink mask packed 8 pixels per byte."""
+    mask = ink_mask(signature)
+    return {"shape": mask.shape, "bits": np.packbits(mask).tobytes()}
+
+
+def has_ink(packed):
+    return packed is not None and np.frombuffer(packed["bits"], dtype=np.uint8).any()
+
+
+def unpack_ink(packed):
+    """Rebuild an RGBA canvas (black ink on transparent) from pack_ink() output."""
+    height, width = packed["shape"]
+    bits = np.frombuffer(packed["bits"], dtype=np.uint8)
+    mask = np.unpackbits(bits, count=height * width).reshape(height, width).astype(bool)
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    rgba[mask, 3] = 255
+    return rgba
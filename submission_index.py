@@ -0,0 +1,156 @@
+"""Local index of timesheet submissions, keyed by week, group, learner and content.
+
+    python submission_index.py --week 3 [--group 1] [--roster roster.xlsx]
+
+lists who has submitted that week (and, given a roster, who hasn't) without
+listing the SharePoint folder.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    week INTEGER NOT NULL,
+    cohort_group INTEGER NOT NULL,
+    learner_key TEXT NOT NULL,
+    learner_name TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    stored_name TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    uploaded_at REAL,
+    PRIMARY KEY (week, cohort_group, learner_key, content_hash)
+);
+CREATE INDEX IF NOT EXISTS submissions_job ON submissions (job_id);
+"""
+
+
+def normalise_name(learner_name):
+    """'  jane   DOE ' and 'Jane Doe' are the same learner."""
+    return re.sub(r"\s+", " ", learner_name).strip().casefold()
+
+
+@contextmanager
+def connect(db_path):
+    """SQLite connection for the submissions database (index and queue share the file)."""
+    db = sqlite3.connect(db_path, timeout=30)
+    db.row_factory = sqlite3.Row
+    try:
+        db.execute("PRAGMA journal_mode=WAL")
+        with db:  # commit on success, roll back on error
+            yield db
+    finally:
+        db.close()
+
+
+def content_hash(submission, signature=None):
+    """sha256 of everything that ends up in the document, signature included.
+
+    `signature` stands in for submission.signature_png, e.g. the packed ink bits,
+    so a resubmit can be matched before the signature is encoded.
+    """
+    fields = asdict(submission)
+    signature_png = fields.pop("signature_png")
+    digest = hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8"))
+    digest.update(signature if signature is not None else signature_png)
+    return digest.hexdigest()
+
+
+class SubmissionIndex:
+    """Which learner submitted what, for each (week, group).
+
+    An identical resubmit (same learner, same content) maps to the job already
+    recorded for it, unless that job failed. Changed content gets a new entry, and
+    the upload keeps the earlier version in SharePoint instead of overwriting it.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with connect(self.db_path) as db:
+            db.executescript(SCHEMA)
+
+    def find(self, week, group, learner_name, digest):
+        """Job id of an identical submission that is queued, uploading or done, else None."""
+        with connect(self.db_path) as db:
+            row = db.execute(
+                "SELECT job_id FROM submissions WHERE week = ? AND cohort_group = ? AND learner_key = ?"
+                " AND content_hash = ? AND status != 'failed'",
+                (int(week), int(group), normalise_name(learner_name), digest),
+            ).fetchone()
+        return row["job_id"] if row else None
+
+    def record(self, week, group, learner_name, digest, job_id, file_name, status="queued", stored_name=None):
+        """Add an entry; uploads that already happened (e.g. bulk runs) pass status='done' and stored_name."""
+        now = time.time()
+        with connect(self.db_path) as db:
+            db.execute(
+                "INSERT OR REPLACE INTO submissions (week, cohort_group, learner_key, learner_name,"
+                " content_hash, job_id, file_name, stored_name, status, created_at, uploaded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (int(week), int(group), normalise_name(learner_name), learner_name.strip(), digest,
+                 job_id, file_name, stored_name, status, now, now if status == "done" else None),
+            )
+
+    def mark(self, job_id, status, stored_name=None):
+        """Update an entry when its job finishes ('done' or 'failed')."""
+        with connect(self.db_path) as db:
+            db.execute(
+                "UPDATE submissions SET status = ?, stored_name = COALESCE(?, stored_name),"
+                " uploaded_at = CASE WHEN ? = 'done' THEN ? ELSE uploaded_at END WHERE job_id = ?",
+                (status, stored_name, status, time.time(), job_id),
+            )
+
+    def submitted(self, week, group=1):
+        """One row per learner with an upload for the week: name, latest file, version count."""
+        with connect(self.db_path) as db:
+            rows = db.execute(
+                "SELECT learner_key, learner_name, stored_name, MAX(uploaded_at) AS uploaded_at,"
+                " COUNT(*) AS versions FROM submissions WHERE week = ? AND cohort_group = ? AND status = 'done'"
+                " GROUP BY learner_key ORDER BY learner_key",
+                (int(week), int(group)),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def missing(self, week, learner_names, group=1):
+        """The names in `learner_names` (e.g. a roster) with no upload for the week."""
+        done = {row["learner_key"] for row in self.submitted(week, group)}
+        return [name for name in learner_names if normalise_name(name) not in done]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Who has (and hasn't) submitted a week's timesheet")
+    parser.add_argument("--week", required=True, type=int)
+    parser.add_argument("--group", default=1, type=int)
+    parser.add_argument("--roster", help="roster .xlsx/.csv with a learner_name column, to list missing learners")
+    parser.add_argument("--db", default=os.getenv("SUBMISSION_QUEUE_DB", "submissions.db"))
+    args = parser.parse_args(argv)
+
+    index = SubmissionIndex(args.db)
+    submitted = index.submitted(args.week, args.group)
+    print(f"Week {args.week} Group {args.group}: {len(submitted)} submitted")
+    for row in submitted:
+        uploaded = time.strftime("%d/%m/%Y %H:%M", time.localtime(row["uploaded_at"]))
+        print(f"  {row['learner_name']:<30} {uploaded}  {row['stored_name']} ({row['versions']} version(s))")
+
+    if args.roster:
+        from bulk_timesheets import read_roster
+        names = [str(row.get("learner_name") or "").strip() for row in read_roster(args.roster)]
+        missing = index.missing(args.week, [name for name in names if name], args.group)
+        print(f"{len(missing)} not submitted")
+        for name in missing:
+            print(f"  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
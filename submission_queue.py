@@ -0,0 +1,350 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+from graph_client import upload_to_sharepoint
+from instrumentation import count, register_collector, span
+from submission_index import SubmissionIndex, connect, content_hash
+from template_registry import get_template_registry
+from template_render import Submission, render
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    cohort_group INTEGER NOT NULL DEFAULT 1,
+    drive_id TEXT,
+    folder_path TEXT,
+    file_name TEXT NOT NULL,
+    submission TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    status_code INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    render_seconds REAL,
+    upload_seconds REAL,
+    document_bytes INTEGER,
+    signature_before_bytes INTEGER,
+    signature_after_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, next_attempt_at);
+"""
+
+# queued -> running -> done, or -> retrying -> running ... -> failed after max_attempts
+PENDING = ("queued", "retrying")
+
+
+class UploadError(Exception):
+    """Graph answered, but not with 200/201."""
+
+
+def pdf_export_enabled():
+    return os.getenv("PDF_EXPORT", "").lower() in ("1", "true", "yes")
+
+
+def start_pdf_export(job, submission):
+    """Queue the PDF copy in the pdf_export process pool; None if it couldn't be started."""
+    from pdf_export import submit_pdf
+    try:
+        snapshot = get_template_registry().snapshot(job["week"], job["cohort_group"])
+        return submit_pdf(snapshot, submission, job["week"])
+    except Exception:
+        count("pdf_export_errors_total", stage="submit")
+        return None
+
+
+def upload_pdf_export(job, future, docx_name):
+    """Upload the PDF next to the .docx, once the job is already done.
+
+    Best effort: the .docx is the record, so a failed or timed-out PDF is logged and
+    counted rather than retrying (and re-uploading) the job.
+    """
+    from pdf_export import pdf_file_name, pdf_result
+    try:
+        with span("pdf_export") as fields:
+            start = time.perf_counter()
+            pdf = pdf_result(future)
+            fields["wait_seconds"] = time.perf_counter() - start
+            fields["bytes"] = len(pdf)
+            response = upload_to_sharepoint(job["drive_id"], job["folder_path"], pdf_file_name(docx_name), pdf,
+                                            conflict_behavior="rename")
+            if response.status_code not in (200, 201):
+                raise UploadError(f"Error uploading PDF: {response.status_code} {response.text}")
+    except Exception:
+        pass  # Already recorded by the span (pdf_export_errors_total and a forced log line)
+
+
+def process_submission(job):
+    """Render the learner's timesheet and upload it. Returns the per-stage timings.
+
+    With PDF export on, the result also carries 'pdf_future', the PDF still
+    rendering; the queue uploads it after recording the .docx as done.
+    """
+    fields = json.loads(job["submission"])
+    submission = Submission(signature_png=job["signature"], **fields)
+
+    start = time.perf_counter()
+    with span("template_load"):
+        compiled = get_template_registry().compiled(job["week"], job["cohort_group"])
+    content = render(compiled, submission)
+    rendered = time.perf_counter()
+    # The PDF renders in another process while the .docx uploads
+    pdf_future = start_pdf_export(job, submission) if pdf_export_enabled() else None
+
+    # An earlier upload under the same name is kept; Graph stores this one as 'name 1.docx'
+    response = upload_to_sharepoint(job["drive_id"], job["folder_path"], job["file_name"], content,
+                                    conflict_behavior="rename")
+    uploaded = time.perf_counter()
+    if response.status_code not in (200, 201):
+        if pdf_future is not None:
+            pdf_future.cancel()  # The retry renders a new one
+        raise UploadError(f"Error submitting timesheet: {response.status_code} {response.text}")
+
+    return {
+        "status_code": response.status_code,
+        "stored_name": response.json().get("name", job["file_name"]),
+        "render_seconds": rendered - start,
+        "upload_seconds": uploaded - rendered,
+        "document_bytes": len(content),
+        "pdf_future": pdf_future,
+    }
+
+
+class SubmissionQueue:
+    """Durable SQLite-backed queue of timesheet submissions, drained by a thread pool.
+
+    Jobs survive a server restart: a job still 'running' `lease_seconds` after it was
+    claimed (its process crashed) is claimed again, while jobs other processes on the
+    same database are working on are left alone. Failed uploads are retried with
+    exponential back-off until `max_attempts` is reached. Identical resubmits are
+    matched in the submission index and never rendered or uploaded twice.
+    """
+
+    def __init__(self, db_path, process=process_submission, workers=4, max_attempts=6,
+                 retry_delay=15, poll_interval=1.0, warmup=None, lease_seconds=600):
+        self.db_path = db_path
+        self.index = SubmissionIndex(db_path)
+        self.process = process
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds  # far longer than a render and upload, retries included
+        self.warmup = warmup  # run once on a worker thread by start(), e.g. compiling templates
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._executor = None
+        self._dispatcher = None
+        self._in_flight = threading.Semaphore(workers)
+
+        with connect(self.db_path) as db:
+            db.executescript(SCHEMA)
+            # Databases from before jobs were rendered by (week, group) have a NOT NULL template_path
+            if any(column["name"] == "template_path" for column in db.execute("PRAGMA table_info(jobs)")):
+                db.execute("ALTER TABLE jobs DROP COLUMN template_path")
+
+    def start(self):
+        if self._dispatcher is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="submission")
+            if self.warmup is not None:
+                self._executor.submit(self.warmup)
+            self._dispatcher = threading.Thread(target=self._dispatch, name="submission-dispatcher", daemon=True)
+            self._dispatcher.start()
+        return self
+
+    def stop(self, wait=True):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+            self._executor.shutdown(wait=wait)
+            self._dispatcher = None
+
+    def find(self, week, group, learner_name, digest):
+        """Job id of an identical submission already queued, running or done, else None.
+
+        Lets callers skip building the document inputs (e.g. encoding the signature)
+        for a resubmit; `digest` is content_hash() of the submission.
+        """
+        existing = self.index.find(week, group, learner_name, digest)
+        if existing is not None:
+            count("submissions_total", status="duplicate")
+        return existing
+
+    def enqueue(self, submission, week, group, drive_id, folder_path, file_name,
+                signature_report=None, digest=None):
+        """Persist a submission and return its job id straight away.
+
+        If the learner already submitted exactly this for the week (and it hasn't
+        failed), the earlier job id is returned instead of queueing a new job.
+        `signature_report` is the before/after size report from encode_signature();
+        `digest` is the content_hash() already used with find(), if any.
+        """
+        if digest is None:
+            digest = content_hash(submission)
+        existing = self.find(week, group, submission.learner_name, digest)
+        if existing is not None:
+            return existing
+
+        signature_report = signature_report or {}
+        fields = asdict(submission)
+        signature = fields.pop("signature_png")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with connect(self.db_path) as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, week, cohort_group, drive_id, folder_path,"
+                " file_name, submission, signature, next_attempt_at, created_at,"
+                " signature_before_bytes, signature_after_bytes)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, int(week), int(group), drive_id, folder_path, file_name,
+                 json.dumps(fields), sqlite3.Binary(signature), now, now,
+                 signature_report.get("before_bytes"), signature_report.get("after_bytes")),
+            )
+        self.index.record(week, group, submission.learner_name, digest, job_id, file_name)
+        count("submissions_total", status="queued")
+        self._wakeup.set()
+        return job_id
+
+    def status(self, job_id):
+        with connect(self.db_path) as db:
+            row = db.execute(
+                "SELECT jobs.id, jobs.status, attempts, status_code, error, jobs.created_at, finished_at,"
+                " jobs.file_name, stored_name FROM jobs LEFT JOIN submissions ON submissions.job_id = jobs.id"
+                " WHERE jobs.id = ?",
+                (job_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _claim(self):
+        """Atomically move the oldest due job (or one whose lease ran out) to 'running' and return it."""
+        now = time.time()
+        with connect(self.db_path) as db:
+            row = db.execute(
+                "SELECT * FROM jobs WHERE (status IN (?, ?) AND next_attempt_at <= ?)"
+                " OR (status = 'running' AND started_at < ?) ORDER BY next_attempt_at LIMIT 1",
+                PENDING + (now, now - self.lease_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?"
+                " WHERE id = ? AND status = ? AND started_at IS ?",
+                (now, row["id"], row["status"], row["started_at"]),
+            ).rowcount
+        return dict(row) if claimed else None
+
+    def _dispatch(self):
+        while not self._stopping.is_set():
+            self._in_flight.acquire()
+            job = self._claim()
+            if job is None:
+                self._in_flight.release()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        try:
+            result = self.process(job)
+        except Exception as e:
+            attempts = job["attempts"] + 1
+            failed = attempts >= self.max_attempts
+            with connect(self.db_path) as db:
+                db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, next_attempt_at = ?, finished_at = ? WHERE id = ?",
+                    ("failed" if failed else "retrying", str(e),
+                     time.time() + self.retry_delay * (2 ** (attempts - 1)),
+                     time.time() if failed else None, job["id"]),
+                )
+            if failed:
+                self.index.mark(job["id"], "failed")
+            count("submissions_total", status="failed" if failed else "retrying")
+        else:
+            # Index first, so status() never shows 'done' without the stored name
+            self.index.mark(job["id"], "done", result.get("stored_name"))
+            with connect(self.db_path) as db:
+                db.execute(
+                    "UPDATE jobs SET status = 'done', error = NULL, status_code = ?, render_seconds = ?,"
+                    " upload_seconds = ?, document_bytes = ?, finished_at = ? WHERE id = ?",
+                    (result["status_code"], result["render_seconds"], result["upload_seconds"],
+                     result.get("document_bytes"), time.time(), job["id"]),
+                )
+            count("submissions_total", status="done")
+            # The learner already sees 'done'; the PDF follows, bounded by PDF_EXPORT_TIMEOUT
+            if result.get("pdf_future") is not None:
+                upload_pdf_export(job, result["pdf_future"], result.get("stored_name") or job["file_name"])
+        finally:
+            self._in_flight.release()
+
+    def metrics(self):
+        """Queue depth by status, average per-stage latency and byte totals of completed jobs."""
+        with connect(self.db_path) as db:
+            counts = dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            latency = db.execute(
+                "SELECT AVG(started_at - created_at), AVG(render_seconds), AVG(upload_seconds),"
+                " AVG(finished_at - created_at) FROM jobs WHERE status = 'done'"
+            ).fetchone()
+            sizes = db.execute(
+                "SELECT SUM(signature_before_bytes), SUM(signature_after_bytes), SUM(document_bytes)"
+                " FROM jobs WHERE status = 'done'"
+            ).fetchone()
+        return {
+            "depth": sum(counts.get(s, 0) for s in PENDING + ("running",)),
+            "counts": counts,
+            "avg_wait_seconds": latency[0],
+            "avg_render_seconds": latency[1],
+            "avg_upload_seconds": latency[2],
+            "avg_total_seconds": latency[3],
+            # Storage saved by signature compaction across everything uploaded
+            "signature_before_bytes": sizes[0],
+            "signature_after_bytes": sizes[1],
+            "document_bytes": sizes[2],
+        }
+
+    def gauges(self):
+        """metrics() as (name, labels, value) triples for the /metrics endpoint."""
+        metrics = self.metrics()
+        gauges = [("submission_queue_depth", {}, metrics["depth"])]
+        gauges += [("submission_queue_jobs", {"status": status}, n) for status, n in metrics["counts"].items()]
+        gauges += [("submission_stage_avg_seconds", {"stage": stage}, metrics[f"avg_{stage}_seconds"])
+                   for stage in ("wait", "render", "upload", "total")]
+        gauges += [(f"submission_{key}", {}, metrics[key])
+                   for key in ("signature_before_bytes", "signature_after_bytes", "document_bytes")]
+        return gauges
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_submission_queue():
+    """The process-wide queue, started on first use. SUBMISSION_QUEUE_DB sets the database file."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if pdf_export_enabled():
+                    # Fork the PDF workers before the queue adds threads of its own
+                    from pdf_export import get_pdf_pool
+                    try:
+                        get_pdf_pool()
+                    except RuntimeError:
+                        count("pdf_export_errors_total", stage="pool")
+                queue = SubmissionQueue(os.getenv("SUBMISSION_QUEUE_DB", "submissions.db"),
+                                        warmup=get_template_registry().preload_compiled).start()
+                register_collector(queue.gauges)
+                _queue = queue
+    return _queue
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import threading
+
+
+# Parse a timesheet template, skipping header row in the second table
+def parse_template(path):
+    # Imported here: pages served from template snapshots never need them
+    import pandas as pd
+    from docx import Document
+
+    doc = Document(path)
+
+    # Read the first paragraph for the weekly timesheet information
+    weekly_timesheet_info = doc.paragraphs[1].text
+
+    day, session_activity, facilitator, time, notes_comments = [], [], [], [], []
+    attendance_data = []  # for second table
+
+    for table_idx, table in enumerate(doc.tables):
+        for row_idx, row in enumerate(table.rows):
+            cells = [cell.text.replace('\n', ' ').strip() for cell in row.cells]
+            if table_idx == 0 and len(cells) == 5:
+                day.append(cells[0])
+                session_activity.append(cells[1])
+                facilitator.append(cells[2])
+                time.append(cells[3])
+                notes_comments.append(cells[4])
+            elif table_idx == 1 and len(cells) >= 4:
+                if row_idx == 0:
+                    continue  # Skip the header row
+                while len(cells) < 5:
+                    cells.append("")  # Add empty cell if columns are missing
+                attendance_data.append(cells[:5])
+
+    df1 = pd.DataFrame({
+        "Day": day,
+        "Session/Activity": session_activity,
+        "Facilitator": facilitator,
+        "Time": time,
+        "Notes/Comments": notes_comments
+    })
+    df2 = pd.DataFrame(attendance_data, columns=["Day", "Date", "AM", "PM", "Learner Signature"])
+
+    return weekly_timesheet_info, df1, df2
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TemplateCache:
+    """Process-wide cache of what `parser` makes of each timesheet template, keyed by (week, group).
+
+    Entries are validated against the file's mtime/size on every lookup. When
+    those change the file is hashed, and it is only re-parsed if the content
+    actually differs. Cached values are shared between sessions, so callers must
+    treat them as read-only.
+    """
+
+    def __init__(self, parser):
+        self._parser = parser
+        self._entries = {}  # key -> (path, stat signature, sha1, parsed)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, path):
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == path and entry[1] == signature:
+                self.hits += 1
+                return entry[3]
+
+            # Touched on disk (or first load): only re-parse if the bytes changed
+            sha1 = _file_digest(path)
+            if entry is not None and entry[0] == path and entry[2] == sha1:
+                self._entries[key] = (path, signature, sha1, entry[3])
+                self.hits += 1
+                return entry[3]
+
+            self.misses += 1
+            parsed = self._parser(path)
+            self._entries[key] = (path, signature, sha1, parsed)
+            return parsed
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def gauges(self, cache):
+        """stats() as (name, labels, value) triples, labelled with the cache's name."""
+        return [(f"template_cache_{key}", {"cache": cache}, value) for key, value in self.stats().items()]
+
@@ -0,0 +1,85 @@
+import os
+import re
+import threading
+
+from template_snapshot import snapshot_cache
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+TEMPLATE_NAME = re.compile(r"^Skills Boot Camp Week (\d+) Group (\d+) Timesheet\.docx$")
+
+
+class TemplateRegistry:
+    """Index of every weekly timesheet template in a directory, keyed by (week, group).
+
+    The directory is scanned once and every template's snapshot (what pages 1 and 2
+    show) is preloaded, so the first learner of each cohort doesn't pay for a parse.
+    Compiled templates (and the modules they need) are loaded by preload_compiled(),
+    which the submission queue runs on a worker thread when it starts, so the
+    first submit for each week doesn't pay for a compile either.
+    """
+
+    def __init__(self, directory=RESOURCES_DIR):
+        self.directory = directory
+        self.templates = {}  # (week, group) -> path
+        for name in sorted(os.listdir(directory)):
+            match = TEMPLATE_NAME.match(name)
+            if match:
+                week, group = int(match.group(1)), int(match.group(2))
+                self.templates[(week, group)] = os.path.join(directory, name)
+
+    def preload(self):
+        for key, path in self.templates.items():
+            snapshot_cache.get(key, path)
+        return self
+
+    def preload_compiled(self):
+        for week, group in self.templates:
+            self.compiled(week, group)
+        return self
+
+    def groups(self):
+        return sorted({group for _, group in self.templates})
+
+    def path(self, week, group):
+        try:
+            return self.templates[(int(week), int(group))]
+        except KeyError:
+            raise LookupError(f"No timesheet template for Week {week} Group {group}") from None
+
+    def snapshot(self, week, group):
+        """Header paragraph, schedule rows and attendance Day/Date rows, without python-docx or pandas."""
+        return snapshot_cache.get((int(week), int(group)), self.path(week, group))
+
+    def compiled(self, week, group):
+        """The compiled template the renderer fills (see template_render.compile_template)."""
+        from template_render import compiled_cache
+        return compiled_cache.get((int(week), int(group)), self.path(week, group))
+
+    def week_for(self, start_date, programme_start, end_date=None):
+        """Programme week (1-based) that the learner's dates fall in.
+
+        With `end_date`, the whole range must sit inside that one week.
+        """
+        week = (start_date - programme_start).days // 7 + 1
+        if week < 1:
+            raise LookupError(f"{start_date:%d/%m/%Y} is before the programme started on {programme_start:%d/%m/%Y}")
+        if end_date is not None:
+            end_week = (end_date - programme_start).days // 7 + 1
+            if end_week != week:
+                raise LookupError(f"{start_date:%d/%m/%Y} to {end_date:%d/%m/%Y} spans programme weeks "
+                                  f"{week} and {end_week}; submit one timesheet per week")
+        return week
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry():
+    """The process-wide registry, scanned and preloaded on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TemplateRegistry().preload()
+    return _registry
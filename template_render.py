@@ -0,0 +1,312 @@
+import re
+import struct
+import zipfile
+from dataclasses import dataclass, field
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+from instrumentation import register_collector, span
+from template_cache import TemplateCache
+from week_calendar import DATE_KEYS
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W = "{%s}" % W_NS
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+IMAGE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+
+DOCUMENT_PART = "word/document.xml"
+RELS_PART = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+SIGNATURE_PART = "word/media/learner_signature.png"
+SIGNATURE_REL_ID = "rIdLearnerSignature"
+
+EMU_PER_INCH = 914400
+DECLARATION_SIGNATURE_WIDTH = 2 * EMU_PER_INCH  # Inches(2)
+ROW_SIGNATURE_WIDTH = EMU_PER_INCH // 2  # Inches(0.5)
+
+ATTENDANCE_TABLE = 1
+
+# Whole-word tokens only, so 'date' no longer matches inside 'start_date'/'end_date'
+PARAGRAPH_TOKENS = re.compile(r"(?<![A-Za-z0-9_])(start_date|end_date|learner_name|learner_signature|date)(?![A-Za-z0-9_])")
+DATE_TOKENS = re.compile(r"(?<![A-Za-z0-9_])(%s)(?![A-Za-z0-9_])" % "|".join(DATE_KEYS))
+ATTENDANCE_TOKENS = re.compile(r"\[(am_pr|am_ab|pm_pr|pm_ab)\]")
+
+SLOT = "@@SLOT%d@@"
+SLOT_PATTERN = re.compile(r"@@SLOT(\d+)@@")
+
+TICK = "✔"
+
+
+@dataclass
+class Submission:
+    """Everything needed to fill one learner's timesheet."""
+    learner_name: str
+    declaration_date: str  # dd-mm-YYYY
+    dates: dict  # date placeholder -> dd/mm/YYYY, as returned by week_calendar.get_weekday_dates
+    attendance: list  # [(am_present, am_absent, pm_present, pm_absent), ...] per attendance row
+    signed_rows: list  # [bool, ...] per attendance row
+    signature_png: bytes
+
+
+@dataclass
+class Placeholder:
+    key: str
+    row: int = None  # attendance row for per-row placeholders
+    # ('paragraph', paragraph_idx, run_idx) or ('table', table_idx, row_idx, cell_idx, paragraph_idx, run_idx)
+    location: tuple = ()
+
+
+@dataclass
+class CompiledTemplate:
+    path: str
+    chunks: list  # static document.xml text around the slots
+    placeholders: list  # one per slot, in document order
+    static_package: bytes = field(repr=False)  # every other part, zipped once at compile time
+    attendance_rows: int = 0
+
+
+def _run_index(paragraph, t):
+    runs = paragraph.findall(W + "r")
+    run = t.getparent()
+    return runs.index(run) if run in runs else -1
+
+
+def _node_text(node):
+    if node.tag == W + "t":
+        return node.text or ""
+    return "\t" if node.tag == W + "tab" else "\n"
+
+
+def _mark_tokens(paragraph, pattern, slots, make_placeholder):
+    """Replace every token matched in the paragraph's text with a slot marker.
+
+    Word happily splits 'start_date' into 'start' + '_date' runs, so matching is done on
+    the concatenated text and the marker is written into the run where the token starts.
+    """
+    # Breaks and tabs count as separators so tokens either side of them stay whole words
+    texts = [t for t in paragraph.iter(W + "t", W + "br", W + "cr", W + "tab")]
+    if not texts:
+        return
+    full = "".join(_node_text(t) for t in texts)
+    matches = list(pattern.finditer(full))
+    if not matches:
+        return
+
+    offsets = []
+    pos = 0
+    for t in texts:
+        offsets.append(pos)
+        pos += len(_node_text(t))
+
+    def locate(char_idx):
+        for i in range(len(texts) - 1, -1, -1):
+            if offsets[i] <= char_idx:
+                return i
+        return 0
+
+    # Right to left so earlier offsets stay valid
+    new_text = [_node_text(t) for t in texts]
+    first_slot = len(slots)
+    for n in range(len(matches) - 1, -1, -1):
+        match = matches[n]
+        first, last = locate(match.start()), locate(match.end() - 1)
+        head = new_text[first][:match.start() - offsets[first]]
+        tail = new_text[last][match.end() - offsets[last]:]
+        if first == last:
+            new_text[first] = head + SLOT % (first_slot + n) + tail
+        else:
+            new_text[first] = head + SLOT % (first_slot + n)
+            for i in range(first + 1, last):
+                new_text[i] = ""
+            new_text[last] = tail
+
+    for t, text in zip(texts, new_text):
+        if t.tag == W + "t" and t.text != text:
+            t.text = text
+            t.set(XML_SPACE, "preserve")
+
+    for match in matches:
+        slots.append(make_placeholder(match.group(1), _run_index(paragraph, texts[locate(match.start())])))
+
+
+def _clear_cell(cell):
+    """Reduce a cell to a single empty run holding a slot marker, like cell.text = ''."""
+    paragraphs = cell.findall(W + "p")
+    keep = paragraphs[0]
+    for p in paragraphs[1:]:
+        cell.remove(p)
+    for child in list(keep):
+        if child.tag != W + "pPr":
+            keep.remove(child)
+    run = etree.SubElement(keep, W + "r")
+    t = etree.SubElement(run, W + "t")
+    t.set(XML_SPACE, "preserve")
+    return t
+
+
+def _png_size(data):
+    # IHDR is always the first chunk: width and height are big-endian uint32s
+    return struct.unpack(">II", data[16:24])
+
+
+def _drawing_xml(png, width_emu, shape_id):
+    px_w, px_h = _png_size(png)
+    height_emu = int(width_emu * px_h / px_w)
+    # Close the enclosing <w:t>, place the picture in the same run, then reopen it
+    return (
+        '</w:t><w:drawing><wp:inline xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+        'distT="0" distB="0" distL="0" distR="0">'
+        '<wp:extent cx="%(cx)d" cy="%(cy)d"/><wp:docPr id="%(id)d" name="Signature %(id)d"/>'
+        '<wp:cNvGraphicFramePr><a:graphicFrameLocks xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+        'noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+        '<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+        '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        '<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        '<pic:nvPicPr><pic:cNvPr id="0" name="learner_signature.png"/><pic:cNvPicPr/></pic:nvPicPr>'
+        '<pic:blipFill><a:blip xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+        'r:embed="%(rel)s"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+        '<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="%(cx)d" cy="%(cy)d"/></a:xfrm>'
+        '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic>'
+        '</a:graphicData></a:graphic></wp:inline></w:drawing><w:t xml:space="preserve">'
+    ) % {"cx": width_emu, "cy": height_emu, "id": shape_id, "rel": SIGNATURE_REL_ID}
+
+
+def _static_package(template_zip):
+    """Zip every part except document.xml once, with the signature relationship pre-wired."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as out:
+        for info in template_zip.infolist():
+            if info.filename == DOCUMENT_PART:
+                continue
+            data = template_zip.read(info.filename)
+            if info.filename == RELS_PART:
+                rels = etree.fromstring(data)
+                rel = etree.SubElement(rels, "{%s}Relationship" % REL_NS)
+                rel.set("Id", SIGNATURE_REL_ID)
+                rel.set("Type", IMAGE_REL_TYPE)
+                rel.set("Target", "media/learner_signature.png")
+                data = etree.tostring(rels, xml_declaration=True, encoding="UTF-8", standalone=True)
+            elif info.filename == CONTENT_TYPES_PART and b'Extension="png"' not in data:
+                types = etree.fromstring(data)
+                default = etree.Element("{http://schemas.openxmlformats.org/package/2006/content-types}Default")
+                default.set("Extension", "png")
+                default.set("ContentType", "image/png")
+                types.insert(0, default)
+                data = etree.tostring(types, xml_declaration=True, encoding="UTF-8", standalone=True)
+            out.writestr(info.filename, data)
+    return buffer.getvalue()
+
+
+def compile_template(path):
+    """Scan a timesheet template once and record where every placeholder sits."""
+    with zipfile.ZipFile(path) as template_zip:
+        root = etree.fromstring(template_zip.read(DOCUMENT_PART))
+        static_package = _static_package(template_zip)
+
+    body = root.find(W + "body")
+    slots = []
+
+    # Body paragraphs: dates, learner name, declaration date and signature
+    for p_idx, paragraph in enumerate(body.findall(W + "p")):
+        _mark_tokens(paragraph, PARAGRAPH_TOKENS, slots,
+                     lambda key, run_idx, p_idx=p_idx: Placeholder(key, location=("paragraph", p_idx, run_idx)))
+
+    # Attendance table: date keys, AM/PM ticks and the per-row signature cell
+    attendance_rows = 0
+    tables = body.findall(W + "tbl")
+    if len(tables) > ATTENDANCE_TABLE:
+        rows = tables[ATTENDANCE_TABLE].findall(W + "tr")
+        for row_idx, row in enumerate(rows[1:]):  # Skip the header row
+            cells = row.findall(W + "tc")
+            if len(cells) < 5:
+                continue
+            attendance_rows += 1
+            for cell_idx, pattern in ((1, DATE_TOKENS), (2, ATTENDANCE_TOKENS), (3, ATTENDANCE_TOKENS)):
+                for p_idx, paragraph in enumerate(cells[cell_idx].findall(W + "p")):
+                    _mark_tokens(paragraph, pattern, slots,
+                                 lambda key, run_idx, r=row_idx, c=cell_idx, p=p_idx: Placeholder(
+                                     key, row=None if c == 1 else r,
+                                     location=("table", ATTENDANCE_TABLE, r + 1, c, p, run_idx)))
+            t = _clear_cell(cells[4])
+            t.text = SLOT % len(slots)
+            slots.append(Placeholder("row_signature", row=row_idx,
+                                     location=("table", ATTENDANCE_TABLE, row_idx + 1, 4, 0, 0)))
+
+    xml = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True).decode("utf-8")
+    parts = SLOT_PATTERN.split(xml)
+    chunks = parts[0::2]
+    order = [int(i) for i in parts[1::2]]
+    placeholders = [slots[i] for i in order]
+
+    return CompiledTemplate(path=path, chunks=chunks, placeholders=placeholders,
+                            static_package=static_package, attendance_rows=attendance_rows)
+
+
+def timesheet_file_name(week, learner_name):
+    """Unique SharePoint file name for a learner's week, e.g. Timesheet_w3_Jane_Doe.docx."""
+    safe_learner_name = re.sub(r'\W+', '_', learner_name)
+    return f'Timesheet_w{week}_{safe_learner_name}.docx'
+
+
+def _tick(checked):
+    return TICK if checked else " "
+
+
+def _slot_values(compiled, submission):
+    shape_ids = iter(range(1000, 1000 + len(compiled.placeholders)))
+    values = []
+    for placeholder in compiled.placeholders:
+        key, row = placeholder.key, placeholder.row
+        if key == "learner_name":
+            value = escape(submission.learner_name)
+        elif key == "date":
+            value = escape(submission.declaration_date)
+        elif key in DATE_KEYS:
+            value = escape(submission.dates.get(key) or "")
+        elif key == "learner_signature":
+            value = _drawing_xml(submission.signature_png, DECLARATION_SIGNATURE_WIDTH, next(shape_ids))
+        elif key == "row_signature":
+            if submission.signed_rows[row]:
+                value = _drawing_xml(submission.signature_png, ROW_SIGNATURE_WIDTH, next(shape_ids))
+            else:
+                value = "Absent"
+        else:
+            am_present, am_absent, pm_present, pm_absent = submission.attendance[row]
+            if key == "am_pr":
+                value = _tick(am_present)
+            elif key == "am_ab":
+                value = _tick(am_absent and not am_present)
+            elif key == "pm_pr":
+                value = _tick(pm_present)
+            else:
+                value = _tick(pm_absent and not pm_present)
+        values.append(value)
+    return values
+
+
+def render(compiled, submission):
+    """Fill a compiled template and return the .docx bytes."""
+    with span("template_fill"):
+        values = _slot_values(compiled, submission)
+        pieces = [compiled.chunks[0]]
+        for value, chunk in zip(values, compiled.chunks[1:]):
+            pieces.append(value)
+            pieces.append(chunk)
+        document_xml = "".join(pieces).encode("utf-8")
+
+    with span("template_save") as fields:
+        buffer = BytesIO(compiled.static_package)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as out:
+            out.writestr(DOCUMENT_PART, document_xml)
+            out.writestr(SIGNATURE_PART, submission.signature_png, compress_type=zipfile.ZIP_STORED)
+        content = buffer.getvalue()
+        fields["bytes"] = len(content)
+    return content
+
+
+# Compiled templates are shared across sessions and recompiled when the file changes
+compiled_cache = TemplateCache(parser=compile_template)
+register_collector(lambda: compiled_cache.gauges("compiled"))
@@ -0,0 +1,127 @@
+"""Precomputed page-1/page-2 view of each timesheet template, stored as JSON.
+
+    python template_snapshot.py            # (re)build resources/snapshots/*.json
+
+A snapshot holds what the UI shows before submit (the header paragraph, the
+schedule table and the attendance rows' Day/Date placeholders) so a cold server
+can paint page 1 without importing python-docx or pandas. It also keeps the
+template's wording around the attendance table (declarations, tutor section) for
+the PDF export. Each snapshot records the sha1 of the .docx it came from and the
+snapshot format version; a stale or missing one is rebuilt from the template on
+first use.
+"""
+import json
+import os
+import sys
+from html import escape
+
+from instrumentation import register_collector
+from template_cache import TemplateCache, _file_digest
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "snapshots")
+SNAPSHOT_VERSION = 2  # Bump when build_snapshot() output changes
+
+
+def snapshot_path(template_path, directory=SNAPSHOT_DIR):
+    return os.path.join(directory, os.path.splitext(os.path.basename(template_path))[0] + ".json")
+
+
+def _segments(paragraph):
+    """A paragraph as [text, bold] pieces, consecutive runs of the same weight merged."""
+    segments = []
+    for run in paragraph.runs:
+        bold = bool(run.bold)
+        if segments and segments[-1][1] == bold:
+            segments[-1][0] += run.text
+        elif run.text:
+            segments.append([run.text, bold])
+    return segments
+
+
+def _body_sections(template_path):
+    """Non-empty paragraphs after each table (as segments), and the tables' cell text."""
+    from docx import Document
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    doc = Document(template_path)
+    after_table, tables = [], []
+    for element in doc.element.body.iterchildren():
+        if element.tag.endswith("}tbl"):
+            table = Table(element, doc)
+            tables.append([[cell.text.strip() for cell in row.cells] for row in table.rows])
+            after_table.append([])
+        elif element.tag.endswith("}p") and after_table:
+            paragraph = Paragraph(element, doc)
+            if paragraph.text.strip():
+                after_table[-1].append(_segments(paragraph))
+    return after_table, tables
+
+
+def build_snapshot(template_path):
+    """Parse the template (python-docx/pandas, imported here only) into a snapshot dict."""
+    from template_cache import parse_template
+    weekly_timesheet_info, df1, df2 = parse_template(template_path)
+    after_table, tables = _body_sections(template_path)
+    return {
+        "template": os.path.basename(template_path),
+        "sha1": _file_digest(template_path),
+        "version": SNAPSHOT_VERSION,
+        "weekly_timesheet_info": weekly_timesheet_info,
+        "schedule": df1.values.tolist(),
+        "attendance_rows": df2[["Day", "Date"]].values.tolist(),
+        # Body text by position: schedule table, declaration, attendance table, learner and tutor declarations, tutor table
+        "declaration": after_table[0] if len(after_table) > 0 else [],
+        "closing": after_table[1] if len(after_table) > 1 else [],
+        "tutor_table": tables[2] if len(tables) > 2 else [],
+    }
+
+
+def write_snapshot(template_path, directory=SNAPSHOT_DIR):
+    snapshot = build_snapshot(template_path)
+    os.makedirs(directory, exist_ok=True)
+    with open(snapshot_path(template_path, directory), "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=1)
+    return snapshot
+
+
+def load_snapshot(template_path):
+    """The template's snapshot, rebuilt (and re-saved if possible) when missing or stale."""
+    try:
+        with open(snapshot_path(template_path), encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") == SNAPSHOT_VERSION and snapshot.get("sha1") == _file_digest(template_path):
+            return snapshot
+    except (OSError, ValueError):
+        pass
+    try:
+        return write_snapshot(template_path)
+    except OSError:
+        return build_snapshot(template_path)  # Read-only deployment: keep it in memory only
+
+
+def schedule_html(snapshot):
+    """The schedule table as HTML, matching df1.to_html(index=False, header=False)."""
+    rows = "".join(
+        "    <tr>\n" + "".join(f"      <td>{escape(str(cell), quote=False)}</td>\n" for cell in row) + "    </tr>\n"
+        for row in snapshot["schedule"]
+    )
+    return f'<table border="1" class="dataframe">\n  <tbody>\n{rows}  </tbody>\n</table>'
+
+
+# Shared by every Streamlit session, like the parsed and compiled template caches
+snapshot_cache = TemplateCache(parser=load_snapshot)
+register_collector(lambda: snapshot_cache.gauges("snapshot"))
+
+
+def main():
+    from template_registry import TemplateRegistry
+    registry = TemplateRegistry()
+    for (week, group), path in sorted(registry.templates.items()):
+        write_snapshot(path)
+        print(f"Week {week} Group {group}: {snapshot_path(path)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Shared test data: a sample submission and the pre-compiled-renderer fill it is checked against."""
+from io import BytesIO
+
+import numpy as np
+from docx import Document
+from docx.shared import Inches
+from PIL import Image as PILImage
+
+from template_render import Submission
+
+
+def sample_canvas():
+    signature = np.full((150, 400, 4), 255, dtype=np.uint8)
+    signature[60:90, 40:360, :3] = 0  # a thick stroke
+    return signature
+
+
+def sample_signature():
+    buffer = BytesIO()
+    PILImage.fromarray(sample_canvas(), 'RGBA').save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def sample_submission():
+    return Submission(
+        learner_name="Jane Doe",
+        declaration_date="17-10-2026",
+        dates={'start_date': '12/10/2026', 'tu_date': '13/10/2026', 'we_date': '14/10/2026',
+               'th_date': '15/10/2026', 'end_date': '16/10/2026'},
+        attendance=[(True, False, True, False)] * 5,
+        signed_rows=[True] * 5,
+        signature_png=sample_signature(),
+    )
+
+
+def legacy_fill(path, submission):
+    """The per-submit python-docx path app.py used before the compiled renderer."""
+    filled_doc = Document(path)
+    signature_image = BytesIO(submission.signature_png)
+
+    for paragraph in filled_doc.paragraphs:
+        if 'start_date' in paragraph.text:
+            paragraph.text = paragraph.text.replace('start_date', submission.dates['start_date'])
+        if 'end_date' in paragraph.text:
+            paragraph.text = paragraph.text.replace('end_date', submission.dates['end_date'])
+        if 'learner_name' in paragraph.text:
+            paragraph.text = paragraph.text.replace('learner_name', submission.learner_name)
+        if 'date' in paragraph.text:
+            paragraph.text = paragraph.text.replace('date', submission.declaration_date)
+        if 'learner_signature' in paragraph.text:
+            paragraph.text = paragraph.text.replace('learner_signature', "")
+            paragraph.add_run().add_picture(signature_image, width=Inches(2))
+
+    table = filled_doc.tables[1]
+    for row_idx, row in enumerate(table.rows[1:]):
+        day_text = row.cells[1].text
+        if day_text in submission.dates:
+            row.cells[1].text = submission.dates[day_text]
+        am_present, am_absent, pm_present, pm_absent = submission.attendance[row_idx]
+        am_text = row.cells[2].text
+        if am_present:
+            am_text = am_text.replace('[am_pr]', '✔').replace('[am_ab]', ' ')
+        else:
+            am_text = am_text.replace('[am_pr]', ' ').replace('[am_ab]', '✔' if am_absent else ' ')
+        row.cells[2].text = am_text
+        pm_text = row.cells[3].text
+        if pm_present:
+            pm_text = pm_text.replace('[pm_pr]', '✔').replace('[pm_ab]', ' ')
+        else:
+            pm_text = pm_text.replace('[pm_pr]', ' ').replace('[pm_ab]', '✔' if pm_absent else ' ')
+        row.cells[3].text = pm_text
+        cell = row.cells[4]
+        if submission.signed_rows[row_idx]:
+            cell.text = ""
+            cell.paragraphs[0].add_run().add_picture(signature_image, width=Inches(0.5))
+        else:
+            cell.text = "Absent"
+
+    buffer = BytesIO()
+    filled_doc.save(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,180 @@
+"""GraphClient retry, pooling and chunking against the local FakeGraph."""
+import pytest
+
+import graph_client
+from fake_graph import FakeGraph
+from graph_client import GraphClient
+
+DRIVE = "drive"
+FOLDER = "Timesheets/Week 1"
+
+
+class StubTokens:
+    def __init__(self):
+        self.issued = 0
+        self.invalidated = 0
+
+    def get_token(self):
+        self.issued += 1
+        return f"token-{self.issued}"
+
+    def invalidate(self):
+        self.invalidated += 1
+
+
+@pytest.fixture
+def graph():
+    with FakeGraph(folders=[FOLDER]) as graph:
+        yield graph
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(graph_client.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.fixture
+def tokens():
+    return StubTokens()
+
+
+@pytest.fixture
+def client(graph, tokens):
+    return GraphClient(tokens, base_url=graph.url, backoff=0.01)
+
+
+def uploads(graph):
+    return [(method, path) for method, path, _ in graph.requests if method == "PUT"]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_throttled_upload_waits_for_retry_after(graph, client, sleeps, status):
+    graph.fail_next(2, status=status, retry_after=3)
+    response = client.upload(DRIVE, FOLDER, "a.docx", b"data")
+    assert response.status_code == 201
+    assert sleeps == [3.0, 3.0]
+    assert client.retry_count == 2
+    assert graph.files[f"{FOLDER}/a.docx"] == b"data"
+
+
+def test_retries_give_up_after_max_retries(graph, tokens, sleeps):
+    client = GraphClient(tokens, base_url=graph.url, max_retries=2, backoff=0.01)
+    client.ensure_folder(DRIVE, FOLDER)
+    graph.fail_next(3, status=503, retry_after=0)
+    assert client.upload(DRIVE, FOLDER, "a.docx", b"data").status_code == 503
+    assert len(sleeps) == 2
+
+
+def test_unauthorized_refreshes_the_token_once(graph, client, tokens):
+    client.ensure_folder(DRIVE, FOLDER)
+    graph.fail_next(1, status=401)
+    assert client.upload(DRIVE, FOLDER, "a.docx", b"data").status_code == 201
+    assert tokens.invalidated == 1
+
+    graph.fail_next(2, status=401)
+    assert client.upload(DRIVE, FOLDER, "b.docx", b"data").status_code == 401
+    assert tokens.invalidated == 2
+
+
+def test_folder_lookup_is_cached(graph, client):
+    for name in ("a.docx", "b.docx", "c.docx"):
+        client.upload(DRIVE, FOLDER, name, b"data")
+    assert [status for method, _, status in graph.requests if method == "GET"] == [200]
+
+
+def test_missing_folder_raises(graph, client):
+    with pytest.raises(graph_client.GraphError) as raised:
+        client.upload(DRIVE, "Nowhere", "a.docx", b"data")
+    assert raised.value.status_code == 404
+
+
+def test_large_upload_goes_through_an_upload_session(graph, tokens):
+    client = GraphClient(tokens, base_url=graph.url, simple_upload_limit=1024, chunk_size=1000)
+    content = bytes(range(256)) * 10  # 2560 bytes: chunks at 0, 1000 and 2000
+    response = client.upload(DRIVE, FOLDER, "big.docx", content)
+
+    assert response.status_code == 201
+    assert graph.files[f"{FOLDER}/big.docx"] == content
+    assert [path for _, path in uploads(graph)] == ["/upload/1"] * 3
+    assert any(path.endswith(":/createUploadSession") for _, path, _ in graph.requests)
+
+
+def test_upload_session_resumes_after_a_throttled_chunk(graph, tokens, sleeps):
+    client = GraphClient(tokens, base_url=graph.url, simple_upload_limit=1024, chunk_size=1000, backoff=0.01)
+    content = b"x" * 2500
+    client.upload(DRIVE, FOLDER, "warmup.docx", b"")  # folder lookup out of the way
+    session_chunks = []
+    original = graph._upload_chunk
+
+    def record(session_id, chunk, content_range):
+        session_chunks.append(content_range)
+        if len(session_chunks) == 2:
+            graph.fail_next(1, status=503, retry_after=0)
+        return original(session_id, chunk, content_range)
+
+    graph._upload_chunk = record
+    assert client.upload(DRIVE, FOLDER, "big.docx", content).status_code == 201
+    assert graph.files[f"{FOLDER}/big.docx"] == content
+    assert session_chunks == ["bytes 0-999/2500", "bytes 1000-1999/2500", "bytes 2000-2499/2500"]
+    assert client.retry_count == 1
+
+
+@pytest.mark.parametrize("limit", [None, 1024])
+def test_rename_keeps_the_earlier_upload(graph, tokens, limit):
+    client = GraphClient(tokens, base_url=graph.url, simple_upload_limit=limit or graph_client.SIMPLE_UPLOAD_LIMIT,
+                         chunk_size=1000)
+    first = client.upload(DRIVE, FOLDER, "x.docx", b"1" * 2000, conflict_behavior="rename")
+    second = client.upload(DRIVE, FOLDER, "x.docx", b"2" * 2000, conflict_behavior="rename")
+    assert first.json()["name"] == "x.docx"
+    assert second.json()["name"] == "x 1.docx"
+    assert graph.files[f"{FOLDER}/x.docx"] == b"1" * 2000
+    assert graph.files[f"{FOLDER}/x 1.docx"] == b"2" * 2000
+
+
+def test_connections_are_pooled(graph, client):
+    for n in range(10):
+        client.upload(DRIVE, FOLDER, f"{n}.docx", b"data")
+    assert graph.connections == 1
+
+
+def test_batch_returns_one_result_per_file_in_order(graph, client, sleeps):
+    original = graph._batch
+
+    def throttle_first_member(payload):
+        if len(graph.requests) < 2:  # first $batch only: its first member is throttled
+            graph.fail_next(1, status=429, retry_after=2)
+        return original(payload)
+
+    graph._batch = throttle_first_member
+    files = [(f"{n}.docx", str(n).encode()) for n in range(25)] + [("0.docx", b"again")]
+    results = client.upload_batch(DRIVE, FOLDER, files)
+
+    assert [name for name, _, _ in results] == [name for name, _ in files]
+    assert all(status in (200, 201) for _, status, _ in results)
+    assert sleeps == [2.0]
+
+
+@pytest.mark.parametrize("retry_after", ["Wed, 21 Oct 2015 07:28:00 GMT", "soon"])
+def test_batch_member_retry_after_may_be_a_date(graph, client, sleeps, retry_after):
+    original = graph._batch
+
+    def throttle_once(payload):
+        if len(graph.requests) < 2:
+            graph.fail_next(1, status=503, retry_after=retry_after)
+        return original(payload)
+
+    graph._batch = throttle_once
+    results = client.upload_batch(DRIVE, FOLDER, [("a.docx", b"a"), ("b.docx", b"b")])
+    assert [status for _, status, _ in results] == [201, 201]
+    assert len(sleeps) == 1 and sleeps[0] < 1  # a past date (or junk) falls back to the short back-off
+
+
+def test_batch_rename_keeps_earlier_uploads(graph, client):
+    client.upload(DRIVE, FOLDER, "x.docx", b"first")
+    results = client.upload_batch(DRIVE, FOLDER, [("x.docx", b"second"), ("y.docx", b"new")],
+                                  conflict_behavior="rename")
+    assert results == [("x.docx", 201, "x 1.docx"), ("y.docx", 201, "y.docx")]
+    assert graph.files[f"{FOLDER}/x.docx"] == b"first"
+    assert graph.files[f"{FOLDER}/x 1.docx"] == b"second"
@@ -0,0 +1,78 @@
+"""SubmissionIndex duplicate matching, versions and the submitted/missing listings."""
+from dataclasses import replace
+
+import pytest
+
+from submission_index import SubmissionIndex, content_hash
+from support import sample_submission
+
+NAME = "Timesheet_w1_Jane_Doe.docx"
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SubmissionIndex(str(tmp_path / "submissions.db"))
+
+
+def test_identical_resubmit_finds_the_earlier_job(index):
+    digest = content_hash(sample_submission())
+    index.record(1, 1, "Jane Doe", digest, "job-1", NAME)
+    assert index.find(1, 1, "Jane Doe", digest) == "job-1"
+    assert index.find(1, 1, "  jane   DOE ", digest) == "job-1"  # same learner, however it's typed
+    assert index.find(2, 1, "Jane Doe", digest) is None
+    assert index.find(1, 2, "Jane Doe", digest) is None
+
+
+def test_failed_job_allows_a_new_one(index):
+    digest = content_hash(sample_submission())
+    index.record(1, 1, "Jane Doe", digest, "job-1", NAME)
+    index.mark("job-1", "failed")
+    assert index.find(1, 1, "Jane Doe", digest) is None
+
+    index.record(1, 1, "Jane Doe", digest, "job-2", NAME)
+    assert index.find(1, 1, "Jane Doe", digest) == "job-2"
+
+
+def test_changed_content_is_a_new_entry(index):
+    first = content_hash(sample_submission())
+    changed = content_hash(replace(sample_submission(), signed_rows=[True, True, True, True, False]))
+    assert changed != first
+
+    index.record(1, 1, "Jane Doe", first, "job-1", NAME)
+    assert index.find(1, 1, "Jane Doe", changed) is None
+    index.record(1, 1, "Jane Doe", changed, "job-2", NAME)
+    assert index.find(1, 1, "Jane Doe", first) == "job-1"
+
+
+def test_signature_stands_in_for_the_png(index):
+    submission = replace(sample_submission(), signature_png=None)
+    assert content_hash(submission, signature=b"ink") == content_hash(submission, signature=b"ink")
+    assert content_hash(submission, signature=b"ink") != content_hash(submission, signature=b"other ink")
+
+
+def test_submitted_lists_done_uploads_with_versions(index):
+    index.record(1, 1, "Jane Doe", "a", "job-1", NAME)
+    index.mark("job-1", "done", NAME)
+    index.record(1, 1, "jane doe", "b", "job-2", NAME)
+    index.mark("job-2", "done", "Timesheet_w1_Jane_Doe 1.docx")
+    index.record(1, 1, "John Smith", "c", "job-3", "Timesheet_w1_John_Smith.docx")  # still queued
+    index.record(1, 1, "Ann Lee", "d", "job-4", "Timesheet_w1_Ann_Lee.docx",
+                 status="done", stored_name="Timesheet_w1_Ann_Lee.docx")  # a bulk upload
+    index.record(2, 1, "Bob Ray", "e", "job-5", "Timesheet_w2_Bob_Ray.docx", status="done")
+
+    rows = index.submitted(1)
+    assert [row["learner_key"] for row in rows] == ["ann lee", "jane doe"]
+    jane = rows[1]
+    assert jane["versions"] == 2
+    assert jane["stored_name"] == "Timesheet_w1_Jane_Doe 1.docx"
+    assert jane["uploaded_at"] is not None
+
+
+def test_missing_lists_roster_names_without_an_upload(index):
+    index.record(1, 1, "Jane Doe", "a", "job-1", NAME, status="done", stored_name=NAME)
+    index.record(1, 1, "John Smith", "b", "job-2", "Timesheet_w1_John_Smith.docx")
+    index.mark("job-2", "failed")
+
+    roster = ["JANE DOE", "John Smith", "Ann Lee"]
+    assert index.missing(1, roster) == ["John Smith", "Ann Lee"]
+    assert index.missing(1, roster, group=2) == roster
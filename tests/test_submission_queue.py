@@ -0,0 +1,169 @@
+"""SubmissionQueue retries, failure, lease recovery and status, with an injected process()."""
+import time
+from concurrent.futures import Future
+from dataclasses import replace
+
+import pytest
+
+import submission_queue
+from submission_index import connect
+from submission_queue import SubmissionQueue
+from support import sample_submission
+
+JOB = dict(week=1, group=1, drive_id="drive", folder_path="Timesheets", file_name="Timesheet_w1_Jane_Doe.docx")
+
+
+class FakeProcess:
+    """Fails the first `failures` calls, then returns a result like process_submission's."""
+
+    def __init__(self, failures=0, **extra):
+        self.failures = failures
+        self.extra = extra
+        self.jobs = []
+
+    def __call__(self, job):
+        self.jobs.append(job)
+        if len(self.jobs) <= self.failures:
+            raise submission_queue.UploadError(f"Error submitting timesheet: 503 attempt {len(self.jobs)}")
+        return {"status_code": 201, "stored_name": job["file_name"], "render_seconds": 0.01,
+                "upload_seconds": 0.02, "document_bytes": 100, **self.extra}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "submissions.db")
+
+
+def wait_for(queue, job_id, *statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = queue.status(job_id)
+        if status["status"] in statuses:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {queue.status(job_id)['status']}")
+
+
+def job_row(db_path, job_id):
+    with connect(db_path) as db:
+        return dict(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def run_next(queue):
+    """Claim and run one due job on this thread, as a queue worker would."""
+    job = queue._claim()
+    assert job is not None
+    queue._in_flight.acquire()
+    queue._run(job)
+    return job
+
+
+def test_job_runs_and_reports_done(db_path):
+    process = FakeProcess()
+    queue = SubmissionQueue(db_path, process=process, poll_interval=0.01).start()
+    try:
+        job_id = queue.enqueue(sample_submission(), **JOB)
+        status = wait_for(queue, job_id, "done")
+    finally:
+        queue.stop()
+
+    assert status["attempts"] == 1
+    assert status["status_code"] == 201
+    assert status["stored_name"] == JOB["file_name"]
+    assert process.jobs[0]["signature"] == sample_submission().signature_png
+    assert job_row(db_path, job_id)["document_bytes"] == 100
+
+
+def test_failed_attempts_back_off_exponentially(db_path):
+    queue = SubmissionQueue(db_path, process=FakeProcess(failures=2), retry_delay=10)
+    job_id = queue.enqueue(sample_submission(), **JOB)
+
+    delays = []
+    for _ in range(2):
+        before = time.time()
+        run_next(queue)
+        row = job_row(db_path, job_id)
+        assert row["status"] == "retrying"
+        assert row["error"] == f"Error submitting timesheet: 503 attempt {len(delays) + 1}"
+        delays.append(row["next_attempt_at"] - before)
+        assert queue._claim() is None  # not due yet
+        with connect(db_path) as db:
+            db.execute("UPDATE jobs SET next_attempt_at = 0 WHERE id = ?", (job_id,))
+
+    assert delays[0] == pytest.approx(10, abs=1)
+    assert delays[1] == pytest.approx(20, abs=1)
+    run_next(queue)
+    assert queue.status(job_id)["status"] == "done"
+    assert queue.status(job_id)["attempts"] == 3
+
+
+def test_job_fails_after_max_attempts_and_can_be_resubmitted(db_path):
+    queue = SubmissionQueue(db_path, process=FakeProcess(failures=10), max_attempts=3,
+                            retry_delay=0, poll_interval=0.01).start()
+    try:
+        job_id = queue.enqueue(sample_submission(), **JOB)
+        status = wait_for(queue, job_id, "failed")
+        assert status["attempts"] == 3
+        assert status["error"].startswith("Error submitting timesheet: 503")
+        assert job_row(db_path, job_id)["finished_at"] is not None
+
+        # A failed job doesn't block the same timesheet being queued again
+        assert queue.enqueue(sample_submission(), **JOB) != job_id
+    finally:
+        queue.stop()
+
+
+def test_identical_resubmit_returns_the_earlier_job(db_path):
+    queue = SubmissionQueue(db_path, process=FakeProcess())
+    job_id = queue.enqueue(sample_submission(), **JOB)
+    assert queue.enqueue(sample_submission(), **JOB) == job_id
+    assert queue.enqueue(replace(sample_submission(), signed_rows=[False] * 5), **JOB) != job_id
+
+
+def test_running_job_is_reclaimed_only_after_its_lease(db_path):
+    queue = SubmissionQueue(db_path, process=FakeProcess(), lease_seconds=60)
+    job_id = queue.enqueue(sample_submission(), **JOB)
+    assert queue._claim()["id"] == job_id  # now 'running', as if another process had it
+
+    # Another process opening the same database leaves a live job alone...
+    restarted = SubmissionQueue(db_path, process=FakeProcess(), lease_seconds=60)
+    assert queue.status(job_id)["status"] == "running"
+    assert restarted._claim() is None
+
+    # ...but takes it back once the lease has run out
+    with connect(db_path) as db:
+        db.execute("UPDATE jobs SET started_at = ? WHERE id = ?", (time.time() - 61, job_id))
+    run_next(restarted)
+    status = restarted.status(job_id)
+    assert status["status"] == "done"
+    assert status["attempts"] == 2
+
+
+def test_status_of_unknown_job_is_none(db_path):
+    assert SubmissionQueue(db_path).status("missing") is None
+
+
+def test_pdf_is_uploaded_after_the_job_is_done(db_path, monkeypatch):
+    pdf_future = Future()
+    process = FakeProcess(pdf_future=pdf_future)
+    queue = SubmissionQueue(db_path, process=process)
+    seen = []
+    monkeypatch.setattr(submission_queue, "upload_pdf_export",
+                        lambda job, future, name: seen.append((queue.status(job["id"])["status"], future, name)))
+
+    job_id = queue.enqueue(sample_submission(), **JOB)
+    run_next(queue)
+    assert seen == [("done", pdf_future, JOB["file_name"])]
+    assert queue.status(job_id)["status"] == "done"
+
+
+def test_metrics_count_jobs_by_status(db_path):
+    queue = SubmissionQueue(db_path, process=FakeProcess())
+    queue.enqueue(sample_submission(), **JOB)
+    queue.enqueue(replace(sample_submission(), learner_name="John Smith"), **JOB)
+    run_next(queue)
+
+    metrics = queue.metrics()
+    assert metrics["counts"] == {"done": 1, "queued": 1}
+    assert metrics["depth"] == 1
+    assert metrics["avg_render_seconds"] == pytest.approx(0.01)
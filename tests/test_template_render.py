@@ -0,0 +1,90 @@
+"""The compiled renderer against python-docx, for every bundled template."""
+import glob
+import os
+import re
+from dataclasses import replace
+from io import BytesIO
+
+import pytest
+from docx import Document
+
+from support import legacy_fill, sample_submission
+from template_render import ATTENDANCE_TABLE, TICK, compile_template, render
+
+RESOURCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources")
+TEMPLATES = sorted(glob.glob(os.path.join(RESOURCES, "*.docx")))
+PLACEHOLDERS = re.compile(r"start_date|end_date|learner_name|learner_signature|tu_date|we_date|th_date"
+                          r"|\[(am|pm)_(pr|ab)\]|(?<![A-Za-z])date(?![A-Za-z])")
+
+
+def mixed_submission():
+    # Present, absent, both boxes, PM only, nothing ticked; alternate rows unsigned
+    return replace(
+        sample_submission(),
+        attendance=[(True, False, True, False), (False, True, False, True), (True, True, False, True),
+                    (False, False, True, False), (False, False, False, False)],
+        signed_rows=[True, False, True, False, False],
+    )
+
+
+def all_paragraphs(doc):
+    yield from doc.paragraphs
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                yield from cell.paragraphs
+
+
+def signature_count(cell):
+    return len(cell._tc.xpath(".//w:drawing"))
+
+
+@pytest.fixture(scope="module", params=TEMPLATES, ids=os.path.basename)
+def template(request):
+    return request.param, compile_template(request.param)
+
+
+def test_every_placeholder_is_filled(template):
+    _, compiled = template
+    doc = Document(BytesIO(render(compiled, mixed_submission())))
+    leftovers = [p.text for p in all_paragraphs(doc) if PLACEHOLDERS.search(p.text)]
+    assert leftovers == []
+
+
+def test_declaration_date_leaves_week_dates_alone(template):
+    _, compiled = template
+    submission = mixed_submission()
+    doc = Document(BytesIO(render(compiled, submission)))
+    text = "\n".join(p.text for p in doc.paragraphs)
+
+    start, end = submission.dates["start_date"], submission.dates["end_date"]
+    assert f"Week {start} – {end}" in text
+    assert f"from {start} to {end}" in text
+    assert f"Date: {submission.declaration_date}" in text
+    assert f"start_{submission.declaration_date}" not in text
+    assert f"Learner Name: {submission.learner_name}" in text
+
+
+def test_attendance_table_matches_legacy_fill(template):
+    path, compiled = template
+    submission = mixed_submission()
+    new = Document(BytesIO(render(compiled, submission))).tables[ATTENDANCE_TABLE]
+    old = Document(BytesIO(legacy_fill(path, submission))).tables[ATTENDANCE_TABLE]
+
+    assert len(new.rows) == len(old.rows)
+    for new_row, old_row in zip(new.rows[1:], old.rows[1:]):
+        assert [c.text for c in new_row.cells[1:4]] == [c.text for c in old_row.cells[1:4]]
+        assert new_row.cells[4].text.strip() == old_row.cells[4].text.strip()
+        assert signature_count(new_row.cells[4]) == signature_count(old_row.cells[4])
+
+
+def test_ticks_and_signatures(template):
+    _, compiled = template
+    table = Document(BytesIO(render(compiled, mixed_submission()))).tables[ATTENDANCE_TABLE]
+    rows = table.rows[1:]
+
+    assert [row.cells[2].text.count(TICK) for row in rows] == [1, 1, 1, 0, 0]
+    assert [row.cells[3].text.count(TICK) for row in rows] == [1, 1, 1, 1, 0]
+    assert rows[2].cells[2].text.index(TICK) < rows[2].cells[2].text.index("Absent")  # present wins
+    assert [signature_count(row.cells[4]) for row in rows] == [1, 0, 1, 0, 0]
+    assert [row.cells[4].text.strip() for row in rows] == ["", "Absent", "", "Absent", "Absent"]
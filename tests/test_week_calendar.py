@@ -0,0 +1,62 @@
+"""validate_range and the placeholder -> date mapping."""
+from datetime import date
+
+import pytest
+
+from week_calendar import get_weekday_dates, validate_range
+
+MONDAY = date(2026, 10, 12)
+
+
+def day(offset):
+    return date.fromordinal(MONDAY.toordinal() + offset)
+
+
+@pytest.mark.parametrize("start, end", [(0, 4), (0, 0), (1, 3), (4, 4), (2, 4)])
+def test_ranges_within_one_week_pass(start, end):
+    validate_range(day(start), day(end))
+
+
+@pytest.mark.parametrize("start, end, message", [
+    (4, 3, "before start date"),
+    (0, 7, "longer than a 5-day week"),
+    (4, 7, "crosses a weekend"),  # Friday to Monday
+    (3, 8, "longer than a 5-day week"),
+    (5, 7, "is a Saturday"),
+    (2, 6, "is a Sunday"),
+    (-1, 2, "is a Sunday"),
+])
+def test_invalid_ranges_are_rejected(start, end, message):
+    with pytest.raises(ValueError, match=message):
+        validate_range(day(start), day(end))
+
+
+def test_full_week_maps_every_placeholder():
+    assert get_weekday_dates(day(0), day(4)) == {
+        "start_date": "12/10/2026", "tu_date": "13/10/2026", "we_date": "14/10/2026",
+        "th_date": "15/10/2026", "end_date": "16/10/2026",
+    }
+
+
+def test_short_week_leaves_days_outside_the_range_blank():
+    # Tuesday to Thursday: the start/end placeholders hold those days, Tuesday and
+    # Thursday also fill their own rows, and nothing is invented for Monday or Friday
+    assert get_weekday_dates(day(1), day(3)) == {
+        "start_date": "13/10/2026", "tu_date": "13/10/2026", "we_date": "14/10/2026",
+        "th_date": "15/10/2026", "end_date": "15/10/2026",
+    }
+    assert get_weekday_dates(day(0), day(1)) == {
+        "start_date": "12/10/2026", "tu_date": "13/10/2026", "we_date": None,
+        "th_date": None, "end_date": "13/10/2026",
+    }
+
+
+def test_mapping_is_a_fresh_dict_each_call():
+    first = get_weekday_dates(day(0), day(4))
+    first["start_date"] = "changed"
+    assert get_weekday_dates(day(0), day(4))["start_date"] == "12/10/2026"
+
+
+def test_invalid_range_raises_from_get_weekday_dates():
+    with pytest.raises(ValueError, match="crosses a weekend"):
+        get_weekday_dates(day(4), day(7))
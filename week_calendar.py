@@ -0,0 +1,46 @@
+from datetime import timedelta
+from functools import lru_cache
+
+# Date placeholders in the templates, Monday to Friday
+DATE_KEYS = ("start_date", "tu_date", "we_date", "th_date", "end_date")
+MIDWEEK_KEYS = {1: "tu_date", 2: "we_date", 3: "th_date"}  # weekday() -> placeholder
+MAX_DAYS = 5
+
+
+def validate_range(start_date, end_date):
+    """Reject ranges a weekly timesheet can't hold, before anything is rendered.
+
+    The range has to sit inside one Monday-Friday week: no weekend days at either
+    end and no wrapping over a weekend (Friday to Monday would put Friday's date in
+    the Monday row and leave Tuesday to Thursday blank).
+    """
+    if end_date < start_date:
+        raise ValueError(f"End date {end_date:%d/%m/%Y} is before start date {start_date:%d/%m/%Y}")
+    if (end_date - start_date).days >= MAX_DAYS:
+        raise ValueError(f"{start_date:%d/%m/%Y} to {end_date:%d/%m/%Y} is longer than a {MAX_DAYS}-day week")
+    for label, day in (("Start", start_date), ("End", end_date)):
+        if day.weekday() >= MAX_DAYS:
+            raise ValueError(f"{label} date {day:%d/%m/%Y} is a {day:%A}; timesheets cover Monday to Friday")
+    if end_date.weekday() < start_date.weekday():
+        raise ValueError(f"{start_date:%d/%m/%Y} to {end_date:%d/%m/%Y} crosses a weekend; "
+                         f"pick dates within one Monday-Friday week")
+
+
+@lru_cache(maxsize=1024)
+def _week_dates(start_date, end_date):
+    validate_range(start_date, end_date)
+    span = (end_date - start_date).days
+    dates = {'start_date': start_date.strftime("%d/%m/%Y"), 'end_date': end_date.strftime("%d/%m/%Y")}
+    for weekday, key in MIDWEEK_KEYS.items():
+        offset = (weekday - start_date.weekday()) % 7
+        dates[key] = (start_date + timedelta(days=offset)).strftime("%d/%m/%Y") if offset <= span else None
+    return tuple((key, dates[key]) for key in DATE_KEYS)
+
+
+def get_weekday_dates(start_date, end_date):
+    """Placeholder -> dd/mm/YYYY for the week (start date, Tuesday, Wednesday, Thursday, end date).
+
+    Worked out once per (start, end) and shared by the page-2 grid and the renderer;
+    midweek days outside the range map to None. Raises ValueError for invalid ranges.
+    """
+    return dict(_week_dates(start_date, end_date))